@@ -11,19 +11,37 @@ bl_info = {
 if "bpy" in locals():
     import importlib
     importlib.reload(core.state)
+    importlib.reload(registry)
     importlib.reload(core.main)
+    importlib.reload(anim)
+    importlib.reload(bake)
     importlib.reload(ui.properties)
     importlib.reload(ui.draw)
     importlib.reload(operators.main)
     importlib.reload(ui.panel)
+    importlib.reload(wire)
+    importlib.reload(jitter)
+    importlib.reload(ring)
+    importlib.reload(stats)
+    importlib.reload(recorder)
+    importlib.reload(take)
     importlib.reload(interface.tracker)
 else:
     from .core import state
+    from .core import registry
     from .core import main as core
+    from .core import anim
+    from .core import bake
     from .ui import properties
     from .ui import draw
     from .operators import main as operators
     from .ui import panel as ui
+    from .interface import wire
+    from .interface import jitter
+    from .interface import ring
+    from .interface import stats
+    from .interface import recorder
+    from .interface import take
     from .interface import tracker
 
 import bpy
@@ -64,6 +82,16 @@ classes = (
 def register():
     tracker.register()
     bpy.types.Scene.bone_xy_allow_drag = bpy.props.BoolProperty(name="Enable Drag Point", default=True)
+    bpy.types.Scene.bone_xy_record_buffered = bpy.props.BoolProperty(
+        name="Buffered Auto-Key",
+        description="With auto-keying on, record joystick drags in memory and write frame-aligned keys on release",
+        default=True
+    )
+    bpy.types.Scene.bone_xy_record_playback = bpy.props.BoolProperty(
+        name="Play While Recording",
+        description="Start playback when a buffered auto-key drag begins, to puppeteer in real time",
+        default=False
+    )
     for cls in classes:
         bpy.utils.register_class(cls)
     bpy.types.Object.bone_xy_groups = bpy.props.CollectionProperty(type=properties.bone_xy_PG_group)
@@ -73,20 +101,64 @@ def register():
     
     # Register Frame Change Handler
     bpy.app.handlers.frame_change_post.append(frame_handler)
+    
+    # Group caches are keyed by RNA pointers, which undo and file loads reallocate
+    for handlers in (bpy.app.handlers.load_post, bpy.app.handlers.undo_post, bpy.app.handlers.redo_post):
+        handlers.append(reset_caches_handler)
+    bpy.app.handlers.depsgraph_update_post.append(depsgraph_handler)
+    registry.mark_dirty()
+    subscribe_rna()
+
+def subscribe_rna():
+    # Cached PoseBone handles are invalidated by renames, edit mode round-trips and armature swaps
+    bpy.msgbus.clear_by_owner(_msgbus_owner)
+    for key in ((bpy.types.Bone, "name"), (bpy.types.Object, "mode"), (bpy.types.Object, "data")):
+        bpy.msgbus.subscribe_rna(key=key, owner=_msgbus_owner, args=(), notify=core.invalidate_targets)
+    # Tracker routes are keyed by object name
+    bpy.msgbus.subscribe_rna(key=(bpy.types.Object, "name"), owner=_msgbus_owner, args=(), notify=registry.mark_dirty)
+
+_msgbus_owner = object()
+
+@bpy.app.handlers.persistent
+def reset_caches_handler(*args):
+    core.invalidate_caches()
+    registry.mark_dirty()
+    # File loads drop all msgbus subscriptions
+    subscribe_rna()
+
+@bpy.app.handlers.persistent
+def depsgraph_handler(scene, depsgraph=None):
+    if registry.check_object_count():
+        # Deleted objects may leave cached handles pointing at freed pose data
+        core.invalidate_targets()
+    if depsgraph is not None and (depsgraph.id_type_updated('COLLECTION') or depsgraph.id_type_updated('SCENE')):
+        registry.mark_scenes_dirty()
 
-def frame_handler(scene):
+@bpy.app.handlers.persistent
+def frame_handler(scene, depsgraph=None):
     # This ensures that when the frame changes (scrubbing), 
     # the bone/object transforms are updated if the joy_x/y handles are animated.
-    for obj in bpy.data.objects:
-        if hasattr(obj, 'bone_xy_groups'):
-            for group in obj.bone_xy_groups:
-                core.update_transforms(obj, group, core.get_limit(group))
+    # Groups whose sampled joystick matches what was last applied are skipped.
+    for obj in registry.controlled_objects(scene):
+        if not core.has_animation(obj):
+            continue
+        for group in obj.bone_xy_groups:
+            limit = core.get_limit(group)
+            if not core.is_applied(group, limit):
+                core.update_transforms(obj, group, limit)
 
 def unregister():
     tracker.unregister()
     # Remove Frame Change Handler
     if frame_handler in bpy.app.handlers.frame_change_post:
         bpy.app.handlers.frame_change_post.remove(frame_handler)
+    for handlers in (bpy.app.handlers.load_post, bpy.app.handlers.undo_post, bpy.app.handlers.redo_post):
+        if reset_caches_handler in handlers:
+            handlers.remove(reset_caches_handler)
+    if depsgraph_handler in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(depsgraph_handler)
+    bpy.msgbus.clear_by_owner(_msgbus_owner)
+    core.invalidate_caches()
     
     if state.HUD_STATE["running"]:
         state.HUD_STATE["running"] = False
@@ -102,6 +174,8 @@ def unregister():
     del bpy.types.Object.bone_xy_groups
     del bpy.types.Object.bone_xy_group_index
     del bpy.types.Scene.bone_xy_allow_drag
+    del bpy.types.Scene.bone_xy_record_buffered
+    del bpy.types.Scene.bone_xy_record_playback
     del bpy.types.Scene.bone_xy_presets
     del bpy.types.Scene.bone_xy_preset_index
 
@@ -0,0 +1,203 @@
+import bpy
+import numpy as np
+
+try:
+    from bpy_extras.anim_utils import action_ensure_channelbag_for_slot, action_get_channelbag_for_slot
+except ImportError:
+    # Blender < 4.4 has no slotted actions, action.fcurves is the only container
+    action_ensure_channelbag_for_slot = None
+    action_get_channelbag_for_slot = None
+
+def get_fcurves(obj, create=False):
+    anim = obj.animation_data
+    if anim is None:
+        if not create:
+            return None
+        anim = obj.animation_data_create()
+
+    action = anim.action
+    if action is None:
+        if not create:
+            return None
+        action = anim.action = bpy.data.actions.new(f"{obj.name}Action")
+
+    if action_ensure_channelbag_for_slot is None:
+        return action.fcurves
+
+    slot = anim.action_slot
+    if slot is None:
+        if not create:
+            return None
+        slot = action.slots.new(obj.id_type, obj.name)
+        anim.action_slot = slot
+    if create:
+        return action_ensure_channelbag_for_slot(action, slot).fcurves
+    channelbag = action_get_channelbag_for_slot(action, slot)
+    return channelbag.fcurves if channelbag else None
+
+def find_fcurve(obj, data_path, index=0):
+    fcurves = get_fcurves(obj)
+    if fcurves is None:
+        return None
+    return fcurves.find(data_path, index=index)
+
+def sample_fcurve(fcurve, frames):
+    evaluate = fcurve.evaluate
+    return np.fromiter((evaluate(f) for f in frames), dtype=np.float64, count=len(frames))
+
+def sample_group_joystick(obj, group, frames):
+    # Samples joy_x/joy_y straight from the action, without touching the scene frame.
+    # Un-animated axes hold their current value.
+    base = group.path_from_id()
+    samples = []
+    for prop in ("joy_x", "joy_y"):
+        fcurve = find_fcurve(obj, f"{base}.{prop}")
+        if fcurve is not None:
+            samples.append(sample_fcurve(fcurve, frames))
+        else:
+            samples.append(np.full(len(frames), getattr(group, prop)))
+    return samples[0], samples[1]
+
+def write_keyframes(obj, data_path, index, frames, values, action_group="", frame_range=None, interpolation=None):
+    # Replaces the keys of one fcurve inside frame_range (defaults to the span of
+    # frames) in a single bulk write. Keys outside that range are kept untouched.
+    fcurves = get_fcurves(obj, create=True)
+    fcurve = fcurves.find(data_path, index=index)
+    if fcurve is None:
+        if action_ensure_channelbag_for_slot is None:
+            fcurve = fcurves.new(data_path, index=index, action_group=action_group)
+        else:
+            fcurve = fcurves.new(data_path, index=index)
+
+    points = fcurve.keyframe_points
+    lo, hi = frame_range if frame_range else (frames[0], frames[-1])
+    if len(points):
+        old = np.empty(len(points) * 2)
+        points.foreach_get("co", old)
+        old_frames = old[0::2]
+        in_range = np.flatnonzero((old_frames >= lo) & (old_frames <= hi))
+        # Reverse order keeps the remaining indices valid
+        for i in in_range[::-1].tolist():
+            points.remove(points[i], fast=True)
+
+    start = len(points)
+    points.add(len(frames))
+    co = np.empty(len(points) * 2)
+    if start:
+        points.foreach_get("co", co)
+    co[start * 2::2] = frames
+    co[start * 2 + 1::2] = values
+    points.foreach_set("co", co)
+    if interpolation is not None:
+        set_interpolation(points, start, len(points), interpolation)
+    fcurve.update()
+    return len(frames)
+
+# Matches Blender's eBezTriple_Interpolation, which is what foreach_get/set exchange
+INTERPOLATION_LINEAR = 1
+
+def set_interpolation(points, start, end, interpolation):
+    modes = np.empty(len(points), dtype=np.int32)
+    points.foreach_get("interpolation", modes)
+    modes[start:end] = interpolation
+    points.foreach_set("interpolation", modes)
+
+def reduce_keys(frames, values, tolerance, keep_end=True):
+    # Ramer-Douglas-Peucker over linear segments. Returns a keep mask so that
+    # linear interpolation between kept keys stays within tolerance everywhere.
+    # keep_end=False lets a flat curve collapse to one key, which is only safe when
+    # no keys follow the range (the curve would otherwise ramp to the next one).
+    n = len(values)
+    keep = np.zeros(n, dtype=bool)
+    if n == 0:
+        return keep
+    keep[0] = True
+    keep[-1] = keep_end
+    if np.all(np.abs(values - values[0]) <= tolerance):
+        # Flat curve, the first and (if needed) last key hold it
+        return keep
+    keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        a, b = stack.pop()
+        if b - a < 2:
+            continue
+        t = (frames[a + 1:b] - frames[a]) / (frames[b] - frames[a])
+        error = np.abs(values[a + 1:b] - (values[a] + t * (values[b] - values[a])))
+        i = int(np.argmax(error))
+        if error[i] > tolerance:
+            mid = a + 1 + i
+            keep[mid] = True
+            stack.append((a, mid))
+            stack.append((mid, b))
+    return keep
+
+def reduce_fcurve(fcurve, lo, hi, tolerance):
+    # Post-pass for curves that were keyed one frame at a time.
+    # Returns (keys before, keys after) inside [lo, hi].
+    points = fcurve.keyframe_points
+    co = np.empty(len(points) * 2)
+    points.foreach_get("co", co)
+    frames, values = co[0::2], co[1::2]
+    in_range = np.flatnonzero((frames >= lo) & (frames <= hi))
+    if len(in_range) < 2:
+        return len(in_range), len(in_range)
+
+    keep = reduce_keys(frames[in_range], values[in_range], tolerance, keep_end=in_range[-1] < len(points) - 1)
+    for i in in_range[~keep][::-1].tolist():
+        points.remove(points[i], fast=True)
+    kept = int(keep.sum())
+    first = int(in_range[0])
+    set_interpolation(points, first, first + kept, INTERPOLATION_LINEAR)
+    fcurve.update()
+    return len(in_range), kept
+
+def align_samples(frames, *channels):
+    # Snaps time-ordered samples to whole frames, keeping the last sample per frame
+    rounded = np.round(np.asarray(frames, dtype=np.float64))
+    unique, first_in_reversed = np.unique(rounded[::-1], return_index=True)
+    last = len(rounded) - 1 - first_in_reversed
+    return (unique,) + tuple(np.asarray(values, dtype=np.float64)[last] for values in channels)
+
+def mute_joystick_curves(obj, group_path):
+    # Existing joystick curves would override the performance during playback.
+    # Returns the props that were muted here, for unmute_joystick_curves.
+    muted = []
+    for prop in ("joy_x", "joy_y"):
+        fcurve = find_fcurve(obj, f"{group_path}.{prop}")
+        if fcurve is not None and not fcurve.mute:
+            fcurve.mute = True
+            muted.append(prop)
+    return muted
+
+def unmute_joystick_curves(obj, group_path, muted):
+    for prop in muted:
+        fcurve = find_fcurve(obj, f"{group_path}.{prop}")
+        if fcurve is not None:
+            fcurve.mute = False
+
+def start_playback(screen):
+    # Returns True if playback was started here, for stop_playback
+    if screen.is_animation_playing:
+        return False
+    bpy.ops.screen.animation_play()
+    return True
+
+def stop_playback(started_playback, playing):
+    if started_playback and playing:
+        bpy.ops.screen.animation_cancel(restore_frame=False)
+
+def write_joystick_keys(obj, group, frames, joy_x, joy_y, tolerance=None):
+    # Bulk-writes joy_x/joy_y keys for a group, replacing keys inside the span of frames.
+    # With a tolerance, keys that linear interpolation reproduces are dropped.
+    base = group.path_from_id()
+    frame_range = (frames[0], frames[-1])
+    count = 0
+    for prop, values in (("joy_x", joy_x), ("joy_y", joy_y)):
+        if tolerance is not None and len(frames) > 2:
+            keep = reduce_keys(frames, values, tolerance)
+            count += write_keyframes(obj, f"{base}.{prop}", 0, frames[keep], values[keep], group.name,
+                                     frame_range=frame_range, interpolation=INTERPOLATION_LINEAR)
+        else:
+            count += write_keyframes(obj, f"{base}.{prop}", 0, frames, values, group.name)
+    return count
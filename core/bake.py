@@ -0,0 +1,96 @@
+import bpy
+import numpy as np
+from .main import get_plan, get_limit, resolve_target
+from .anim import sample_group_joystick, sample_fcurve, write_keyframes, reduce_keys, reduce_fcurve, find_fcurve, INTERPOLATION_LINEAR
+
+def bake_frames(start, end, step):
+    return np.arange(start, end + 1, step, dtype=np.float64)
+
+def evaluate_group_tracks(obj, group, frames, tracks=None):
+    # Evaluates a group over every frame at once and accumulates its deltas into
+    # tracks: {(target, path): {axis: deltas}}. Groups driving the same channel add
+    # up, the same way mappings inside one group do.
+    if tracks is None:
+        tracks = {}
+    plan = get_plan(group)
+    if not plan.count:
+        return tracks
+    limit = get_limit(group)
+    joy_x, joy_y = sample_group_joystick(obj, group, frames)
+    deltas = plan.evaluate_batch(joy_x * limit, joy_y * limit)
+
+    for key, axes in plan.vectors:
+        target, path = resolve_target(obj, key)
+        if not target:
+            continue
+        track = tracks.setdefault((target, path), {})
+        for a_index, slot in axes:
+            if a_index in track:
+                track[a_index] = track[a_index] + deltas[:, slot]
+            else:
+                track[a_index] = deltas[:, slot].copy()
+    return tracks
+
+def write_tracks(tracks, frames, tolerances=None):
+    # Keys every component of each vector, like keyframe_insert(data_path) does.
+    # Components no mapping drives keep their existing animation, resampled over the
+    # range, or are keyed flat at their current value when they have none.
+    # tolerances maps a data path ("location", ...) to the max error allowed when
+    # reducing keys; without it every frame is keyed.
+    # Returns (keys written, keys before reduction).
+    written = 0
+    total = 0
+    frame_range = (frames[0], frames[-1])
+    for (target, path), axes in tracks.items():
+        obj = target.id_data
+        data_path = target.path_from_id(path)
+        action_group = target.name if isinstance(target, bpy.types.PoseBone) else "Object Transforms"
+        # Base scale is 1.0, max_value is the absolute added scale
+        base = 1.0 if path == "scale" else 0.0
+        current = list(getattr(target, path))
+        for index, value in enumerate(current):
+            deltas = axes.get(index)
+            if deltas is not None:
+                values = base + deltas
+            else:
+                fcurve = find_fcurve(obj, data_path, index)
+                values = np.full(len(frames), value) if fcurve is None else sample_fcurve(fcurve, frames)
+            total += len(frames)
+            if tolerances is not None:
+                keep = reduce_keys(frames, values, tolerances.get(path, 0.0))
+                written += write_keyframes(obj, data_path, index, frames[keep], values[keep], action_group,
+                                           frame_range=frame_range, interpolation=INTERPOLATION_LINEAR)
+            else:
+                written += write_keyframes(obj, data_path, index, frames, values, action_group)
+    return written, total
+
+def reduce_targets(targets, start, end, tolerances):
+    # Reduces curves already keyed on (target, path) pairs. Returns (keys after, keys before).
+    before = 0
+    after = 0
+    for target, path in targets:
+        obj = target.id_data
+        data_path = target.path_from_id(path)
+        for index in range(len(getattr(target, path))):
+            fcurve = find_fcurve(obj, data_path, index)
+            if fcurve is None:
+                continue
+            b, a = reduce_fcurve(fcurve, start, end, tolerances.get(path, 0.0))
+            before += b
+            after += a
+    return after, before
+
+def bake_groups(pairs, start, end, step=1, tolerances=None):
+    # pairs: iterable of (object, group). Every group is sampled once over the
+    # shared frame range before any F-Curve is written.
+    # Returns (keys written, keys before reduction).
+    frames = bake_frames(start, end, step)
+    if not len(frames):
+        return 0, 0
+    tracks = {}
+    for obj, group in pairs:
+        evaluate_group_tracks(obj, group, frames, tracks)
+    return write_tracks(tracks, frames, tolerances)
+
+def bake_group(obj, group, start, end, step=1, tolerances=None):
+    return bake_groups(((obj, group),), start, end, step, tolerances)
@@ -1,5 +1,39 @@
 import bpy
-import math
+import numpy as np
+
+BLEND_AXIS_X = 0
+BLEND_AXIS_Y = 1
+BLEND_BOX = 2
+BLEND_RADIAL = 3
+
+BLEND_CODES = {
+    'AXIS_X': BLEND_AXIS_X,
+    'AXIS_Y': BLEND_AXIS_Y,
+    'BOX': BLEND_BOX,
+    'RADIAL': BLEND_RADIAL,
+}
+
+PROP_PATHS = {
+    'LOCATION': "location",
+    'ROTATION': "rotation_euler",
+    'SCALE': "scale",
+}
+
+# Compiled evaluation plans, keyed by group pointer
+_PLANS = {}
+
+# Writes closer than this to the current value are skipped, so they do not tag the depsgraph
+WRITE_TOLERANCE = 1e-6
+
+# Last joystick state written by update_transforms, keyed by group pointer: (joy_x, joy_y, limit, plan)
+_APPLIED = {}
+
+# Resolved transform targets, keyed by object pointer:
+# {"data": armature pointer, "targets": {(target_type, bone_name, prop_type): (target, path)}}
+_TARGETS = {}
+
+# Limit caches, keyed by group pointer: [per-item max(|target_x|, |target_y|), running max]
+_LIMITS = {}
 
 def get_active_group(obj):
     if obj and hasattr(obj, 'bone_xy_groups') and len(obj.bone_xy_groups) > 0:
@@ -8,68 +42,289 @@ def get_active_group(obj):
             return obj.bone_xy_groups[idx]
     return None
 
+def _build_limit(group):
+    magnitudes = [max(abs(item.target_x), abs(item.target_y)) for item in group.bone_xy_list]
+    entry = _LIMITS[group.as_pointer()] = [magnitudes, max(magnitudes, default=0.0)]
+    return entry
+
 def get_limit(group):
-    if group and hasattr(group, 'bone_xy_list') and len(group.bone_xy_list) > 0:
-        return max([abs(item.target_x) for item in group.bone_xy_list] + [abs(item.target_y) for item in group.bone_xy_list] + [1.0])
+    if group and hasattr(group, 'bone_xy_list'):
+        entry = _LIMITS.get(group.as_pointer())
+        # The length check catches list edits made outside the add-on (Python console, scripts)
+        if entry is None or len(entry[0]) != len(group.bone_xy_list):
+            entry = _build_limit(group)
+        return max(entry[1], 1.0)
     return 1.0
 
-def update_transforms(obj, group, limit):
-    val_x = group.joy_x * limit
-    val_y = group.joy_y * limit
-    
-    transform_deltas = {}
-
-    for item in group.bone_xy_list:
-        target_key = (item.target_type, item.bone_name, item.prop_type, int(item.axis_index))
-        
-        mode = item.blend_mode
-        if mode == 'AUTO':
-            is_x = abs(item.target_y) < 0.001 and abs(item.target_x) > 0.001
-            is_y = abs(item.target_x) < 0.001 and abs(item.target_y) > 0.001
-            if is_x:
-                mode = 'AXIS_X'
-            elif is_y:
-                mode = 'AXIS_Y'
-            else:
-                mode = 'BOX'
-        
-        if mode == 'AXIS_X':
-            dist = abs(val_x - item.target_x)
-        elif mode == 'AXIS_Y':
-            dist = abs(val_y - item.target_y)
-        elif mode == 'BOX':
-            dist = max(abs(val_x - item.target_x), abs(val_y - item.target_y))
-        else:
-            dist = math.hypot(val_x - item.target_x, val_y - item.target_y)
-
-        weight = max(0.0, 1.0 - (dist / item.radius)) if item.radius > 0 else 0.0
-        
-        # Accumulate the delta
-        if target_key not in transform_deltas:
-            transform_deltas[target_key] = 0.0
-        transform_deltas[target_key] += weight * item.max_value
-        
-    for key, delta in transform_deltas.items():
-        t_type, b_name, p_type, a_index = key
-        
+def limit_set_target(group, index, target_x, target_y):
+    entry = _LIMITS.get(group.as_pointer())
+    if entry is None or not 0 <= index < len(entry[0]):
+        return
+    magnitudes = entry[0]
+    old = magnitudes[index]
+    new = magnitudes[index] = max(abs(target_x), abs(target_y))
+    if new >= entry[1]:
+        entry[1] = new
+    elif old >= entry[1]:
+        # The previous maximum shrank, rescan the cached magnitudes (no RNA access)
+        entry[1] = max(magnitudes)
+
+def limit_insert(group, index, target_x, target_y):
+    entry = _LIMITS.get(group.as_pointer())
+    if entry is None:
+        return
+    new = max(abs(target_x), abs(target_y))
+    entry[0].insert(index, new)
+    entry[1] = max(entry[1], new)
+
+def limit_remove(group, index):
+    entry = _LIMITS.get(group.as_pointer())
+    if entry is None or not 0 <= index < len(entry[0]):
+        return
+    old = entry[0].pop(index)
+    if old >= entry[1]:
+        entry[1] = max(entry[0], default=0.0)
+
+def limit_move(group, src, dst):
+    entry = _LIMITS.get(group.as_pointer())
+    if entry is None or not (0 <= src < len(entry[0]) and 0 <= dst < len(entry[0])):
+        return
+    entry[0].insert(dst, entry[0].pop(src))
+
+def resolve_blend_mode(mode, target_x, target_y):
+    if mode == 'AUTO':
+        is_x = abs(target_y) < 0.001 and abs(target_x) > 0.001
+        is_y = abs(target_x) < 0.001 and abs(target_y) > 0.001
+        if is_x:
+            return 'AXIS_X'
+        elif is_y:
+            return 'AXIS_Y'
+        return 'BOX'
+    return mode
+
+def locate_item(item):
+    # Items only know their owning object, so walk back up the RNA path to the group.
+    # Returns (group, index) or (None, -1).
+    group_path, _, tail = item.path_from_id().rpartition(".bone_xy_list[")
+    if not group_path:
+        return None, -1
+    try:
+        return item.id_data.path_resolve(group_path), int(tail.rstrip("]"))
+    except ValueError:
+        return None, -1
+
+class GroupPlan:
+    # Flat snapshot of a group's mappings. Evaluating it touches no RNA,
+    # so it is only rebuilt when the mappings themselves change.
+    __slots__ = ("count", "target_x", "target_y", "radius", "max_value", "blend", "slots", "channels", "vectors",
+                 "labels", "revision")
+
+    def __init__(self, group):
+        items = group.bone_xy_list
+        n = len(items)
+        self.count = n
+        self.target_x = np.zeros(n)
+        self.target_y = np.zeros(n)
+        self.radius = np.zeros(n)
+        self.max_value = np.zeros(n)
+        self.blend = np.zeros(n, dtype=np.int8)
+        self.slots = np.zeros(n, dtype=np.intp)
+        self.channels = []
+        self.labels = []
+        # Bumped by in-place edits so HUD layout caches know to rebuild
+        self.revision = 0
+
+        channel_slots = {}
+        for i, item in enumerate(items):
+            tx, ty = item.target_x, item.target_y
+            self.target_x[i] = tx
+            self.target_y[i] = ty
+            self.radius[i] = item.radius
+            self.max_value[i] = item.max_value
+            self.blend[i] = BLEND_CODES.get(resolve_blend_mode(item.blend_mode, tx, ty), BLEND_RADIAL)
+
+            key = (item.target_type, item.bone_name, item.prop_type, int(item.axis_index))
+            self.labels.append(item.bone_name if item.target_type == 'BONE' else "Object")
+            slot = channel_slots.get(key)
+            if slot is None:
+                slot = channel_slots[key] = len(self.channels)
+                self.channels.append(key)
+            self.slots[i] = slot
+
+        # Channels grouped per written vector: [((target_type, bone_name, prop_type), ((axis, slot), ...)), ...]
+        vectors = {}
+        for slot, (t_type, b_name, p_type, axis) in enumerate(self.channels):
+            vectors.setdefault((t_type, b_name, p_type), []).append((axis, slot))
+        self.vectors = [(key, tuple(axes)) for key, axes in vectors.items()]
+
+    def evaluate(self, val_x, val_y):
+        # Returns the accumulated delta of every channel, in self.channels order
+        return np.bincount(self.slots, weights=self._contributions(val_x, val_y), minlength=len(self.channels))
+
+    def evaluate_batch(self, val_x, val_y):
+        # val_x/val_y are arrays of joystick samples; returns (samples, channels) deltas
+        contributions = self._contributions(np.asarray(val_x)[:, None], np.asarray(val_y)[:, None])
+        one_hot = np.zeros((self.count, len(self.channels)))
+        one_hot[np.arange(self.count), self.slots] = 1.0
+        return contributions @ one_hot
+
+    def _contributions(self, val_x, val_y):
+        dx = np.abs(val_x - self.target_x)
+        dy = np.abs(val_y - self.target_y)
+        dist = np.where(self.blend == BLEND_AXIS_X, dx,
+               np.where(self.blend == BLEND_AXIS_Y, dy,
+               np.where(self.blend == BLEND_BOX, np.maximum(dx, dy), np.hypot(dx, dy))))
+
+        valid = self.radius > 0
+        safe_radius = np.where(valid, self.radius, 1.0)
+        weight = np.where(valid, np.maximum(0.0, 1.0 - dist / safe_radius), 0.0)
+        return weight * self.max_value
+
+    def set_target(self, index, target_x, target_y, blend_mode):
+        # Patch a single mapping in place, dragging a target point should not recompile the group
+        self.target_x[index] = target_x
+        self.target_y[index] = target_y
+        self.blend[index] = BLEND_CODES.get(resolve_blend_mode(blend_mode, target_x, target_y), BLEND_RADIAL)
+        self.revision += 1
+
+def get_plan(group):
+    key = group.as_pointer()
+    plan = _PLANS.get(key)
+    # The length check catches list edits made outside the add-on (Python console, scripts)
+    if plan is None or plan.count != len(group.bone_xy_list):
+        plan = _PLANS[key] = GroupPlan(group)
+    return plan
+
+def patch_plan_target(group, index, target_x, target_y, blend_mode):
+    plan = _PLANS.get(group.as_pointer())
+    if plan is not None and 0 <= index < plan.count:
+        plan.set_target(index, target_x, target_y, blend_mode)
+        _APPLIED.pop(group.as_pointer(), None)
+
+def invalidate_plans(group=None):
+    if group is None:
+        _PLANS.clear()
+    else:
+        _PLANS.pop(group.as_pointer(), None)
+
+def invalidate_caches(group=None):
+    # Drops everything derived from a group. Use after structural changes to
+    # bone_xy_groups, which can relocate every group of the object.
+    invalidate_plans(group)
+    if group is None:
+        _LIMITS.clear()
+        _APPLIED.clear()
+        _TARGETS.clear()
+    else:
+        _LIMITS.pop(group.as_pointer(), None)
+        _APPLIED.pop(group.as_pointer(), None)
+
+def invalidate_targets(obj=None):
+    # PoseBone references die when bones are renamed, added or removed, so this
+    # must run on rename, mode switches, armature swaps, undo and file load.
+    if obj is None:
+        _TARGETS.clear()
+    else:
+        _TARGETS.pop(obj.as_pointer(), None)
+
+def resolve_target(obj, key):
+    # Returns (PoseBone or Object, data path) for a (target_type, bone_name, prop_type) key, or (None, None)
+    data = obj.data
+    data_ptr = data.as_pointer() if data else 0
+    entry = _TARGETS.get(obj.as_pointer())
+    if entry is None or entry["data"] != data_ptr:
+        entry = _TARGETS[obj.as_pointer()] = {"data": data_ptr, "targets": {}}
+
+    handle = entry["targets"].get(key)
+    if handle is None:
+        t_type, b_name, p_type = key
         target = None
         if t_type == 'BONE' and obj.type == 'ARMATURE':
-            if b_name and b_name in obj.pose.bones:
-                target = obj.pose.bones[b_name]
+            if b_name:
+                target = obj.pose.bones.get(b_name)
         elif t_type == 'OBJECT':
             target = obj
-            
+        path = PROP_PATHS.get(p_type)
+        handle = entry["targets"][key] = (target, path) if target and path else (None, None)
+    return handle
+
+def keyframe_targets(obj, group):
+    # Unique (target, data path) pairs a group writes to, for keyframing
+    targets = set()
+    for key, _ in get_plan(group).vectors:
+        target, path = resolve_target(obj, key)
         if target:
-            if p_type == 'LOCATION':
-                target.location[a_index] = delta
-            elif p_type == 'ROTATION':
-                target.rotation_euler[a_index] = delta
-            elif p_type == 'SCALE':
-                # Base scale is typically 1.0, so base 0.0 logic means: scale = 1.0 + delta
-                # But to keep it consistent with translation, the user might expect it to act directly.
-                # However, scale 0 is bad. We map delta from 0 base to 1.0 scale base?
-                # The user will set max_value to the absolute added scale. So base is 1.0.
-                # Wait, if we use 0.0 base for delta, Scale should probably be 1.0 + delta.
-                target.scale[a_index] = 1.0 + delta
+            targets.add((target, path))
+    return targets
+
+def has_animation(obj):
+    anim = obj.animation_data
+    return bool(anim and (anim.action or anim.drivers or anim.nla_tracks))
+
+def is_applied(group, limit):
+    # True when the group's current joystick state is already reflected on its targets
+    key = group.as_pointer()
+    state = _APPLIED.get(key)
+    if state is None:
+        return False
+    return (state[0] == group.joy_x and state[1] == group.joy_y
+            and state[2] == limit and state[3] is _PLANS.get(key))
+
+def update_transforms(obj, group, limit):
+    plan = get_plan(group)
+    if not plan.count:
+        return
+
+    joy_x, joy_y = group.joy_x, group.joy_y
+    _APPLIED[group.as_pointer()] = (joy_x, joy_y, limit, plan)
+    deltas = plan.evaluate(joy_x * limit, joy_y * limit).tolist()
+
+    # Gather each vector's channels and write it once, and only if something moved
+    for key, axes in plan.vectors:
+        target, path = resolve_target(obj, key)
+        if not target:
+            continue
+        # Base scale is 1.0, max_value is the absolute added scale
+        base = 1.0 if path == "scale" else 0.0
+        values = list(getattr(target, path))
+        changed = False
+        for a_index, slot in axes:
+            value = base + deltas[slot]
+            if abs(values[a_index] - value) > WRITE_TOLERANCE:
+                values[a_index] = value
+                changed = True
+        if changed:
+            setattr(target, path, values)
 
+def update_transforms_merged(pairs, limits):
+    # Evaluates several groups and writes their summed deltas, the way mappings inside
+    # one group add up, so groups driving the same channel don't overwrite each other.
+    sums = {}   # (target pointer, path) -> (target, path, {axis: delta})
+    for (obj, group), limit in zip(pairs, limits):
+        # The merged result is not what this group alone would apply
+        _APPLIED.pop(group.as_pointer(), None)
+        plan = get_plan(group)
+        if not plan.count:
+            continue
+        deltas = plan.evaluate(group.joy_x * limit, group.joy_y * limit).tolist()
+        for key, axes in plan.vectors:
+            target, path = resolve_target(obj, key)
+            if not target:
+                continue
+            entry = sums.setdefault((target.as_pointer(), path), (target, path, {}))
+            summed = entry[2]
+            for a_index, slot in axes:
+                summed[a_index] = summed.get(a_index, 0.0) + deltas[slot]
 
+    for target, path, summed in sums.values():
+        # Base scale is 1.0, max_value is the absolute added scale
+        base = 1.0 if path == "scale" else 0.0
+        values = list(getattr(target, path))
+        changed = False
+        for a_index, delta in summed.items():
+            value = base + delta
+            if abs(values[a_index] - value) > WRITE_TOLERANCE:
+                values[a_index] = value
+                changed = True
+        if changed:
+            setattr(target, path, values)
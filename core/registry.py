@@ -0,0 +1,143 @@
+import bpy
+
+# Index of objects that actually own bone_xy groups.
+# bone_xy_groups is registered on every Object, so hasattr() cannot tell them apart.
+_OBJECTS = {}   # obj pointer -> obj
+_GROUPS = {}    # obj pointer -> {group name: group index}
+_ROUTES = {}    # tracker group id "<object>_<group>" -> (obj, group index)
+_SCENES = {}    # scene pointer -> {obj pointer} of controlled objects linked to that scene
+_STATE = {
+    "dirty": True,
+    "routes_dirty": True,
+    "object_count": -1,
+    # Bumped whenever the set of tracker group ids changes
+    "version": 0,
+}
+
+def mark_dirty():
+    _STATE["dirty"] = True
+    _STATE["routes_dirty"] = True
+    _SCENES.clear()
+
+def mark_scenes_dirty():
+    # Call when objects may have been linked to or unlinked from scenes
+    _SCENES.clear()
+
+def rebuild():
+    _OBJECTS.clear()
+    _GROUPS.clear()
+    _SCENES.clear()
+    for obj in bpy.data.objects:
+        if len(obj.bone_xy_groups) > 0:
+            _index_object(obj)
+    _STATE["object_count"] = len(bpy.data.objects)
+    _STATE["dirty"] = False
+
+def _ensure():
+    if _STATE["dirty"]:
+        rebuild()
+
+def _index_object(obj):
+    key = obj.as_pointer()
+    _OBJECTS[key] = obj
+    _GROUPS[key] = {group.name: i for i, group in enumerate(obj.bone_xy_groups)}
+    _STATE["routes_dirty"] = True
+    _SCENES.clear()
+
+def refresh(obj):
+    # Call after adding, removing, moving or renaming groups on obj
+    if _STATE["dirty"] or obj is None:
+        return
+    key = obj.as_pointer()
+    if len(obj.bone_xy_groups) > 0:
+        _index_object(obj)
+    else:
+        _OBJECTS.pop(key, None)
+        _GROUPS.pop(key, None)
+        _STATE["routes_dirty"] = True
+        _SCENES.clear()
+
+def check_object_count():
+    # Duplicating, appending or deleting objects bypasses our operators,
+    # so a changed object count forces a rebuild on next access.
+    # Returns True when the object set changed.
+    if len(bpy.data.objects) != _STATE["object_count"]:
+        mark_dirty()
+        _STATE["object_count"] = len(bpy.data.objects)
+        return True
+    return False
+
+def controlled_objects(scene=None):
+    _ensure()
+    if scene is not None:
+        # users_scene walks every scene's collection tree, so membership is only
+        # looked up again after the object or scene set changed
+        members = _SCENES.get(scene.as_pointer())
+        if members is None:
+            members = _SCENES[scene.as_pointer()] = {
+                obj.as_pointer() for obj in controlled_objects() if scene in obj.users_scene
+            }
+        return [obj for obj in controlled_objects() if obj.as_pointer() in members]
+    stale = []
+    result = []
+    for key, obj in _OBJECTS.items():
+        try:
+            obj.name
+        except ReferenceError:
+            stale.append(key)
+            continue
+        result.append(obj)
+    for key in stale:
+        _OBJECTS.pop(key, None)
+        _GROUPS.pop(key, None)
+    if stale:
+        _STATE["routes_dirty"] = True
+    return result
+
+def group_names(obj):
+    _ensure()
+    return _GROUPS.get(obj.as_pointer(), {})
+
+def find_group(obj, name):
+    idx = group_names(obj).get(name)
+    if idx is not None and idx < len(obj.bone_xy_groups):
+        group = obj.bone_xy_groups[idx]
+        if group.name == name:
+            return group
+    return obj.bone_xy_groups.get(name)
+
+def routes():
+    # Rebuilt lazily after any object or group add, remove or rename
+    if _STATE["dirty"] or _STATE["routes_dirty"]:
+        objects = controlled_objects()
+        previous = set(_ROUTES)
+        _ROUTES.clear()
+        for obj in objects:
+            for name, idx in _GROUPS[obj.as_pointer()].items():
+                _ROUTES[f"{obj.name}_{name}"] = (obj, idx)
+        if previous != _ROUTES.keys():
+            _STATE["version"] += 1
+        _STATE["routes_dirty"] = False
+    return _ROUTES
+
+def routes_version():
+    routes()
+    return _STATE["version"]
+
+def resolve_route(group_id):
+    # Returns (obj, group) for a tracker group id, or (None, None)
+    route = routes().get(group_id)
+    if route is None:
+        return None, None
+    obj, idx = route
+    try:
+        groups = obj.bone_xy_groups
+        if idx < len(groups):
+            group = groups[idx]
+            if f"{obj.name}_{group.name}" == group_id:
+                return obj, group
+    except ReferenceError:
+        pass
+    # Changed behind our back (scripted rename, undo), rebuild on next lookup
+    mark_dirty()
+    return None, None
@@ -9,6 +9,8 @@ HUD_STATE = {
     "drag_offset_x": 0.0,
     "drag_offset_y": 0.0,
     "dragging_target_idx": -1,
+    "hover_target_idx": -1,
+    "suspend_updates": False,
     "drag_start_limit": 1.0
 }
 
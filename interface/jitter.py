@@ -0,0 +1,103 @@
+# Per-group jitter buffer for tracker input
+#
+# Samples are stamped on the local time.perf_counter() clock: the receive time, or the
+# sender's timestamp mapped onto the local clock when the tracker sends one. The rig is
+# then driven a fixed latency behind "now", interpolating between the samples around that
+# moment and extrapolating briefly past the newest one when a packet is late.
+
+import bisect
+
+BUFFER_SIZE = 8
+# Longest a late group is extrapolated before its value is held
+MAX_EXTRAPOLATION = 0.05
+# Buffers whose newest sample is older than this are dropped
+STALE_AFTER = 1.0
+# How quickly the sender clock offset follows an increasing delay, per sample
+OFFSET_RELAX = 0.01
+
+class JitterBuffer:
+    __slots__ = ("times", "xs", "ys", "offset", "held")
+
+    def __init__(self):
+        self.times = []
+        self.xs = []
+        self.ys = []
+        self.offset = None
+        # True once the settled value has been handed out
+        self.held = False
+
+    def local_time(self, received, sent):
+        if sent is None:
+            return received
+        # The smallest receive - send difference comes from the least delayed packet and
+        # is the best guess for the clock offset. It creeps back up so drifting sender
+        # clocks are followed.
+        delta = received - sent
+        if self.offset is None or delta < self.offset:
+            self.offset = delta
+        else:
+            self.offset += (delta - self.offset) * OFFSET_RELAX
+        return sent + self.offset
+
+    def push(self, received, sent, x, y):
+        t = self.local_time(received, sent)
+        if self.times and t <= self.times[-1]:
+            # Reordered or duplicated datagram
+            return
+        self.times.append(t)
+        self.xs.append(x)
+        self.ys.append(y)
+        if len(self.times) > BUFFER_SIZE:
+            del self.times[0], self.xs[0], self.ys[0]
+        self.held = False
+
+    def sample(self, t):
+        # Returns (x, y, settled). settled means later calls return the same value
+        # until a new sample is pushed.
+        times, xs, ys = self.times, self.xs, self.ys
+        if t <= times[0]:
+            return xs[0], ys[0], False
+        if t >= times[-1]:
+            if len(times) < 2:
+                return xs[-1], ys[-1], True
+            span = times[-1] - times[-2]
+            # Extrapolate for at most half a step to ride out a late packet, then ease
+            # back over the same time to the newest real sample, so a stream that
+            # pauses settles where it stopped instead of past it
+            reach = min(MAX_EXTRAPOLATION, span * 0.5)
+            ahead = t - times[-1]
+            if ahead >= 2.0 * reach:
+                return xs[-1], ys[-1], True
+            k = (ahead if ahead <= reach else 2.0 * reach - ahead) / span
+            return xs[-1] + (xs[-1] - xs[-2]) * k, ys[-1] + (ys[-1] - ys[-2]) * k, False
+        i = bisect.bisect_right(times, t)
+        k = (t - times[i - 1]) / (times[i] - times[i - 1])
+        return xs[i - 1] + (xs[i] - xs[i - 1]) * k, ys[i - 1] + (ys[i] - ys[i - 1]) * k, False
+
+    def is_stale(self, t):
+        return t - self.times[-1] > STALE_AFTER
+
+def smooth_values(buffers, values, now, latency):
+    # buffers: {group id: JitterBuffer}, updated in place.
+    # values: mailbox swap {group id: (x, y, receive time, sender time or None)}.
+    # Returns {group id: (x, y)} for the groups whose value changes at this tick.
+    for group_id, (x, y, received, sent) in values.items():
+        buffer = buffers.get(group_id)
+        if buffer is None:
+            buffer = buffers[group_id] = JitterBuffer()
+        buffer.push(received, sent, x, y)
+
+    t = now - latency
+    smoothed = {}
+    stale = []
+    for group_id, buffer in buffers.items():
+        if buffer.held:
+            if buffer.is_stale(t):
+                stale.append(group_id)
+            continue
+        x, y, settled = buffer.sample(t)
+        smoothed[group_id] = (x, y)
+        buffer.held = settled
+    for group_id in stale:
+        del buffers[group_id]
+    return smoothed
@@ -0,0 +1,94 @@
+# Tracker session log
+#
+# Append-only binary file of every message the tracker server received, byte for byte,
+# so a take can be replayed through the same parse and apply path.
+#
+#   file header   magic "BXYL" | version u16 | reserved u16
+#   records       kind u8 | peer u32 | time f64 | length u32 | payload
+#
+# PEER records introduce a sender before its first message; their payload is the
+# source's group id prefix and legacy active-group key, utf-8, separated by a NUL.
+# MESSAGE records hold one JSON or binary message exactly as it arrived. A binary peer
+# that sent its group table before the recording started gets a rebuilt table message
+# right after its PEER record, so its frames replay.
+# time is seconds since the recording started, on the receive clock.
+
+import struct
+import threading
+import time
+from . import wire
+
+MAGIC = b"BXYL"
+VERSION = 1
+
+KIND_PEER = 1
+KIND_MESSAGE = 2
+
+FILE_HEADER = struct.Struct("<4sHH")
+RECORD = struct.Struct("<BIdI")
+
+class LogError(ValueError):
+    pass
+
+class Recorder:
+    # Written from the server thread, opened and closed from the main thread
+    def __init__(self, path):
+        self.file = open(path, "wb")
+        self.file.write(FILE_HEADER.pack(MAGIC, VERSION, 0))
+        self.start = time.perf_counter()
+        self.peers = {}
+        self.lock = threading.Lock()
+        self.messages = 0
+
+    def write(self, peer, data, stamp):
+        with self.lock:
+            if self.file is None:
+                return
+            peer_id = self.peers.get(peer)
+            if peer_id is None:
+                peer_id = self.peers[peer] = len(self.peers)
+                info = f"{peer.prefix}\0{peer.active}".encode("utf-8")
+                self.file.write(RECORD.pack(KIND_PEER, peer_id, 0.0, len(info)))
+                self.file.write(info)
+                if peer.table is not None:
+                    # Table ids map to prefixed group ids; replay adds the prefix again
+                    cut = len(peer.prefix)
+                    table = wire.encode_group_table((k, v[cut:]) for k, v in peer.table.items())
+                    self.file.write(RECORD.pack(KIND_MESSAGE, peer_id, stamp - self.start, len(table)))
+                    self.file.write(table)
+            self.file.write(RECORD.pack(KIND_MESSAGE, peer_id, stamp - self.start, len(data)))
+            self.file.write(data)
+            self.messages += 1
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+def read_log(path):
+    # Yields (kind, peer id, time, payload). A log cut short by a crash ends at its
+    # last complete record.
+    with open(path, "rb") as f:
+        head = f.read(FILE_HEADER.size)
+        if len(head) < FILE_HEADER.size:
+            raise LogError("not a tracker log")
+        magic, version, _ = FILE_HEADER.unpack(head)
+        if magic != MAGIC:
+            raise LogError("not a tracker log")
+        if version != VERSION:
+            raise LogError(f"unsupported tracker log version {version}")
+        while True:
+            head = f.read(RECORD.size)
+            if len(head) < RECORD.size:
+                return
+            kind, peer_id, t, length = RECORD.unpack(head)
+            payload = f.read(length)
+            if len(payload) < length:
+                return
+            yield kind, peer_id, t, payload
+
+def decode_peer(payload):
+    # Returns (prefix, active group key)
+    prefix, _, active = payload.decode("utf-8").partition("\0")
+    return prefix, active
@@ -0,0 +1,176 @@
+# Shared-memory tracker transport
+#
+# A memory-mapped file holding a single-producer ring of fixed-size records, for
+# trackers running on the same machine. The reader polls it from the Blender timer,
+# so samples cost no socket syscalls, thread hand-off or JSON parsing.
+#
+# Layout (little-endian):
+#   0    header   magic "BXYR" | version u16 | reserved u16 | capacity u32 | table slots u32
+#   24   table sequence u32    odd while the writer updates the group table
+#   32   write sequence u64    number of records ever written
+#   64   group table           table slots x (name_len u8 | name utf-8, 63 bytes)
+#   ...  records               capacity x (sequence u64 | id u16 | flags u16 | x f32 | y f32 | t f64 | pad)
+#
+# A record's sequence is zeroed before its fields are rewritten and set to its write
+# sequence + 1 afterwards. The reader checks it before and after unpacking, which
+# detects records that were being overwritten while it read them.
+# t is the capture time on the writer's time.perf_counter() clock, valid when
+# flags & FLAG_TIMESTAMP.
+
+import mmap
+import os
+import struct
+import tempfile
+
+MAGIC = b"BXYR"
+VERSION = 1
+
+FLAG_TIMESTAMP = 0x01
+
+HEADER = struct.Struct("<4sHHII")
+TABLE_SEQ = struct.Struct("<I")
+WRITE_SEQ = struct.Struct("<Q")
+RECORD = struct.Struct("<QHHffd4x")
+SEQUENCE = struct.Struct("<Q")
+RECORD_BODY = struct.Struct("<HHffd")
+
+TABLE_SEQ_OFFSET = 24
+WRITE_SEQ_OFFSET = 32
+TABLE_OFFSET = 64
+TABLE_SLOT = 64
+
+DEFAULT_CAPACITY = 4096
+DEFAULT_TABLE_SLOTS = 1024
+
+class RingError(ValueError):
+    pass
+
+def default_path():
+    return os.path.join(tempfile.gettempdir(), "bone_xy_tracker.ring")
+
+def ring_size(capacity, table_slots):
+    return TABLE_OFFSET + table_slots * TABLE_SLOT + capacity * RECORD.size
+
+def open_ring(path, capacity=DEFAULT_CAPACITY, table_slots=DEFAULT_TABLE_SLOTS):
+    # Maps an existing ring, or creates one when the file is missing. Any other
+    # existing file is left alone, it may be something the user typed by mistake.
+    # Returns (mmap, capacity, table slots).
+    if os.path.exists(path):
+        with open(path, "r+b") as f:
+            head = f.read(HEADER.size)
+            if len(head) < HEADER.size:
+                raise RingError(f"{path} is not a ring buffer")
+            magic, version, _, existing_capacity, existing_slots = HEADER.unpack(head)
+            if magic != MAGIC:
+                raise RingError(f"{path} is not a ring buffer")
+            if version != VERSION:
+                raise RingError(f"unsupported ring version {version}")
+            size = ring_size(existing_capacity, existing_slots)
+            if os.path.getsize(path) < size:
+                raise RingError(f"{path} is a truncated ring buffer")
+            mm = mmap.mmap(f.fileno(), size)
+            return mm, existing_capacity, existing_slots
+
+    size = ring_size(capacity, table_slots)
+    with open(path, "x+b") as f:
+        f.truncate(size)
+        mm = mmap.mmap(f.fileno(), size)
+    HEADER.pack_into(mm, 0, MAGIC, VERSION, 0, capacity, table_slots)
+    return mm, capacity, table_slots
+
+class RingWriter:
+    # Producer side, for trackers written in Python. Other languages only need to
+    # follow the layout above.
+    def __init__(self, path=None, capacity=DEFAULT_CAPACITY, table_slots=DEFAULT_TABLE_SLOTS):
+        self.mm, self.capacity, self.table_slots = open_ring(path or default_path(), capacity, table_slots)
+        self.sequence = WRITE_SEQ.unpack_from(self.mm, WRITE_SEQ_OFFSET)[0]
+
+    def set_groups(self, names):
+        # Group ids are indices into names
+        if len(names) > self.table_slots:
+            raise RingError("too many groups for the ring's table")
+        table_seq = TABLE_SEQ.unpack_from(self.mm, TABLE_SEQ_OFFSET)[0]
+        TABLE_SEQ.pack_into(self.mm, TABLE_SEQ_OFFSET, table_seq + 1)
+        for i in range(self.table_slots):
+            offset = TABLE_OFFSET + i * TABLE_SLOT
+            raw = names[i].encode("utf-8")[:TABLE_SLOT - 1] if i < len(names) else b""
+            self.mm[offset] = len(raw)
+            self.mm[offset + 1:offset + 1 + len(raw)] = raw
+        TABLE_SEQ.pack_into(self.mm, TABLE_SEQ_OFFSET, table_seq + 2)
+
+    def write(self, values, timestamp=None):
+        # values: iterable of (id, x, y). The write sequence is published once at the end.
+        flags = 0 if timestamp is None else FLAG_TIMESTAMP
+        t = timestamp or 0.0
+        base = TABLE_OFFSET + self.table_slots * TABLE_SLOT
+        for group_id, x, y in values:
+            offset = base + (self.sequence % self.capacity) * RECORD.size
+            SEQUENCE.pack_into(self.mm, offset, 0)
+            RECORD_BODY.pack_into(self.mm, offset + SEQUENCE.size, group_id, flags, x, y, t)
+            SEQUENCE.pack_into(self.mm, offset, self.sequence + 1)
+            self.sequence += 1
+        WRITE_SEQ.pack_into(self.mm, WRITE_SEQ_OFFSET, self.sequence)
+
+    def close(self):
+        self.mm.close()
+
+class RingReader:
+    def __init__(self, path=None):
+        self.mm, self.capacity, self.table_slots = open_ring(path or default_path())
+        self.records = TABLE_OFFSET + self.table_slots * TABLE_SLOT
+        # Start at the current end, old records belong to a previous session
+        self.sequence = WRITE_SEQ.unpack_from(self.mm, WRITE_SEQ_OFFSET)[0]
+        self.table_seq = -1
+        self.names = {}
+        # Records overwritten before they could be read
+        self.dropped = 0
+
+    def read_table(self):
+        table_seq = TABLE_SEQ.unpack_from(self.mm, TABLE_SEQ_OFFSET)[0]
+        if table_seq == self.table_seq or table_seq & 1:
+            return
+        names = {}
+        for i in range(self.table_slots):
+            offset = TABLE_OFFSET + i * TABLE_SLOT
+            length = self.mm[offset]
+            if length:
+                names[i] = self.mm[offset + 1:offset + 1 + length].decode("utf-8", "replace")
+        if TABLE_SEQ.unpack_from(self.mm, TABLE_SEQ_OFFSET)[0] == table_seq:
+            self.names = names
+            self.table_seq = table_seq
+
+    def read(self, values, stamp):
+        # Adds every new record to values, in the tracker mailbox format:
+        # {group id: (x, y, receive time, sender time or None)}. Returns records read.
+        end = WRITE_SEQ.unpack_from(self.mm, WRITE_SEQ_OFFSET)[0]
+        if end == self.sequence:
+            return 0
+        if end < self.sequence:
+            # The writer recreated the ring
+            self.sequence = 0
+        if end - self.sequence > self.capacity:
+            self.dropped += end - self.sequence - self.capacity
+            self.sequence = end - self.capacity
+
+        self.read_table()
+        names = self.names
+        mm = self.mm
+        count = 0
+        while self.sequence < end:
+            offset = self.records + (self.sequence % self.capacity) * RECORD.size
+            expected = self.sequence + 1
+            sequence, group_id, flags, x, y, t = RECORD.unpack_from(mm, offset)
+            if sequence != expected or SEQUENCE.unpack_from(mm, offset)[0] != expected:
+                # Overwritten by a writer that lapped us mid-read
+                self.dropped += 1
+                self.sequence += 1
+                continue
+            self.sequence += 1
+            name = names.get(group_id)
+            if name is not None:
+                values[name] = (x, y, stamp, t if flags & FLAG_TIMESTAMP else None)
+                count += 1
+        return count
+
+    def close(self):
+        self.mm.close()
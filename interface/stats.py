@@ -0,0 +1,119 @@
+# Tracker instrumentation
+#
+# Counters are bumped by the server thread, the replay thread and the Blender timer,
+# sometimes at the same time, so every update goes through STATS_LOCK. Readers take
+# no lock and may see a value one update old, which is fine for display.
+# Rates and latencies live in fixed-size rings, so a long session never grows memory.
+
+import threading
+import time
+from array import array
+
+# Seconds of per-second packet counts kept
+RATE_HISTORY = 60
+# Most recent receive -> apply latencies kept, in seconds
+LATENCY_HISTORY = 1024
+# Histogram bucket upper bounds in milliseconds, plus one overflow bucket
+LATENCY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 250)
+
+TRACKER_STATS = {
+    "packets": 0,         # messages received, any source and format
+    "parse_errors": 0,    # malformed or unexpected messages
+    "send_errors": 0,     # GET_GROUPS / table ack replies that could not be sent
+    "values": 0,          # group values posted to the mailbox
+    "coalesced": 0,       # values replaced in the mailbox before the timer took them
+    "dropped": 0,         # values lost before parsing (ring overruns, oversized stream messages)
+    "unrouted": 0,        # values for group ids no object has
+    "applied": 0,         # values written to the rig
+    "queue_depth": 0,     # groups waiting in the mailbox at the last timer tick
+    "last_error": "",
+}
+
+STATS_LOCK = threading.Lock()
+
+_RATE = array("L", bytes(array("L").itemsize * RATE_HISTORY))
+_RATE_STATE = {"second": 0}
+_LATENCY = array("d", bytes(array("d").itemsize * LATENCY_HISTORY))
+_LATENCY_STATE = {"index": 0, "count": 0}
+
+def reset():
+    with STATS_LOCK:
+        _reset()
+
+def _reset():
+    for key in TRACKER_STATS:
+        TRACKER_STATS[key] = "" if key == "last_error" else 0
+    for i in range(RATE_HISTORY):
+        _RATE[i] = 0
+    _RATE_STATE["second"] = int(time.perf_counter())
+    _LATENCY_STATE["index"] = 0
+    _LATENCY_STATE["count"] = 0
+
+def add(key, count=1):
+    with STATS_LOCK:
+        TRACKER_STATS[key] += count
+
+def record_packet(stamp, count=1):
+    second = int(stamp)
+    with STATS_LOCK:
+        if second > _RATE_STATE["second"]:
+            # Clear the slots of the seconds that passed without packets
+            for s in range(max(_RATE_STATE["second"] + 1, second - RATE_HISTORY + 1), second + 1):
+                _RATE[s % RATE_HISTORY] = 0
+            _RATE_STATE["second"] = second
+        _RATE[second % RATE_HISTORY] += count
+        TRACKER_STATS["packets"] += count
+
+def record_error(key, error):
+    with STATS_LOCK:
+        TRACKER_STATS[key] += 1
+        TRACKER_STATS["last_error"] = f"{type(error).__name__}: {error}"
+
+def record_latency(delays):
+    # delays: iterable of receive -> apply latencies in seconds
+    with STATS_LOCK:
+        index = _LATENCY_STATE["index"]
+        count = _LATENCY_STATE["count"]
+        for delay in delays:
+            _LATENCY[index] = delay
+            index = (index + 1) % LATENCY_HISTORY
+            count += 1
+        _LATENCY_STATE["index"] = index
+        _LATENCY_STATE["count"] = min(count, LATENCY_HISTORY)
+
+def packet_rate(now=None):
+    # Packets received during the last complete second
+    second = int(time.perf_counter() if now is None else now) - 1
+    if second > _RATE_STATE["second"] or second <= _RATE_STATE["second"] - RATE_HISTORY:
+        return 0
+    return _RATE[second % RATE_HISTORY]
+
+def latency_samples():
+    return sorted(_LATENCY[:_LATENCY_STATE["count"]])
+
+def latency_histogram(samples=None):
+    # Counts per LATENCY_BUCKETS bucket, the last entry counts everything slower
+    if samples is None:
+        samples = latency_samples()
+    counts = [0] * (len(LATENCY_BUCKETS) + 1)
+    bucket = 0
+    for delay in samples:
+        ms = delay * 1000.0
+        while bucket < len(LATENCY_BUCKETS) and ms > LATENCY_BUCKETS[bucket]:
+            bucket += 1
+        counts[bucket] += 1
+    return counts
+
+def snapshot():
+    # Everything above in one dict, for the panel or for scripts (interface.stats.snapshot())
+    samples = latency_samples()
+    result = dict(TRACKER_STATS)
+    result["packets_per_second"] = packet_rate()
+    if samples:
+        result["latency_p50"] = samples[len(samples) // 2]
+        result["latency_p95"] = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+        result["latency_max"] = samples[-1]
+    else:
+        result["latency_p50"] = result["latency_p95"] = result["latency_max"] = 0.0
+    result["latency_histogram"] = latency_histogram(samples)
+    return result
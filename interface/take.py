@@ -0,0 +1,120 @@
+# Record-take mode for live tracker input
+#
+# While the timeline plays, every tracker sample of every routed group is stored in
+# preallocated arrays, stamped with the sub-frame scene time it arrived at. When the
+# take ends, each group's joy_x/joy_y curves are written with one bulk foreach_set.
+
+import bpy
+import math
+import numpy as np
+from ..core.anim import write_joystick_keys, mute_joystick_curves, unmute_joystick_curves, start_playback, stop_playback
+
+# Max error of the reduced curves, same as buffered auto-key
+TAKE_TOLERANCE = 0.001
+# Extra room on top of the expected sample count before a buffer has to grow
+CAPACITY_MARGIN = 1.25
+
+class TakeBuffer:
+    __slots__ = ("obj", "group_path", "frames", "xs", "ys", "count", "muted")
+
+    def __init__(self, obj, group, capacity):
+        self.obj = obj
+        self.group_path = group.path_from_id()
+        self.frames = np.empty(capacity, dtype=np.float64)
+        self.xs = np.empty(capacity, dtype=np.float64)
+        self.ys = np.empty(capacity, dtype=np.float64)
+        self.count = 0
+        self.muted = []
+
+    def append(self, frame, x, y):
+        n = self.count
+        if n and frame <= self.frames[n - 1]:
+            # Looped or stalled timeline, the first pass wins
+            return
+        if n == len(self.frames):
+            for name in ("frames", "xs", "ys"):
+                grown = np.empty(n * 2, dtype=np.float64)
+                grown[:n] = getattr(self, name)
+                setattr(self, name, grown)
+        self.frames[n] = frame
+        self.xs[n] = max(-1.0, min(1.0, x))
+        self.ys[n] = max(-1.0, min(1.0, y))
+        self.count = n + 1
+
+TAKE_STATE = {
+    "active": False,
+    "buffers": {},      # group pointer -> TakeBuffer
+    "capacity": 0,
+    "started_playback": False,
+    "was_playing": False,
+    "result": None,     # (groups written, keys written) of the last committed take
+}
+
+def is_playing():
+    wm = bpy.context.window_manager
+    if wm is None:
+        return False
+    return any(window.screen.is_animation_playing for window in wm.windows)
+
+def start_take(context, rate):
+    # rate: tracker apply rate in Hz. The mailbox holds one sample per group per tick,
+    # so the rest of the frame range at that rate bounds how many samples arrive.
+    scene = context.scene
+    fps = scene.render.fps / scene.render.fps_base
+    seconds = max(1.0, (scene.frame_end - scene.frame_current + 1) / fps)
+    TAKE_STATE["capacity"] = int(math.ceil(seconds * rate * CAPACITY_MARGIN)) + 16
+    TAKE_STATE["buffers"] = {}
+    TAKE_STATE["active"] = True
+    TAKE_STATE["result"] = None
+    TAKE_STATE["started_playback"] = start_playback(context.screen)
+    TAKE_STATE["was_playing"] = True
+
+def capture(resolved, now, scene):
+    # resolved: iterable of (obj, group, (x, y, receive time, sender time)).
+    # Samples are placed by receive time, counted back from the frame shown now.
+    fps = scene.render.fps / scene.render.fps_base
+    frame_now = scene.frame_current_final
+    buffers = TAKE_STATE["buffers"]
+    for obj, group, value in resolved:
+        key = group.as_pointer()
+        buffer = buffers.get(key)
+        if buffer is None:
+            buffer = buffers[key] = TakeBuffer(obj, group, TAKE_STATE["capacity"])
+            buffer.muted = mute_joystick_curves(obj, buffer.group_path)
+        buffer.append(frame_now - (now - value[2]) * fps, value[0], value[1])
+
+def commit_take():
+    # Returns (groups written, keys written)
+    TAKE_STATE["active"] = False
+    stop_playback(TAKE_STATE["started_playback"], is_playing())
+    buffers = TAKE_STATE["buffers"]
+    TAKE_STATE["buffers"] = {}
+
+    groups = 0
+    keys = 0
+    for buffer in buffers.values():
+        obj = buffer.obj
+        try:
+            # Unmute first, the curves outlive a removed group
+            unmute_joystick_curves(obj, buffer.group_path, buffer.muted)
+            group = obj.path_resolve(buffer.group_path)
+        except (ValueError, ReferenceError):
+            continue
+        n = buffer.count
+        if not n:
+            continue
+        keys += write_joystick_keys(obj, group, buffer.frames[:n], buffer.xs[:n], buffer.ys[:n], TAKE_TOLERANCE)
+        groups += 1
+    TAKE_STATE["result"] = (groups, keys)
+    return groups, keys
+
+def update_take(resolved, now, scene):
+    # Called once per tracker tick while a take is active. Ends the take when
+    # playback stops. Returns (groups written, keys written) once it has.
+    playing = is_playing()
+    if playing:
+        capture(resolved, now, scene)
+    elif TAKE_STATE["was_playing"]:
+        TAKE_STATE["was_playing"] = False
+        return commit_take()
+    return None
@@ -1,141 +1,632 @@
 import bpy
+import os
 import socket
+import selectors
+import stat
+import struct
 import threading
-import queue
+import time
 import json
-from ..core.main import update_transforms, get_limit
+from ..core.main import update_transforms, get_limit, is_applied, WRITE_TOLERANCE
+from ..core.state import HUD_STATE
+from ..core import registry
+from . import wire
+from . import stats
+from .jitter import smooth_values
+from .ring import RingReader
+from . import recorder
+from . import take
 
-TRACKER_QUEUE = queue.Queue()
 TRACKER_THREAD = None
-TRACKER_SOCKET = None
 TRACKER_RUNNING = False
+# Write end of the server thread's wake-up socket pair
+TRACKER_WAKE = None
+# Session log being written, see interface/recorder.py
+TRACKER_RECORDER = None
+# Shared-memory reader, when the ring transport is selected instead of UDP
+TRACKER_RING = None
 
-def udp_server_thread(port):
-    global TRACKER_SOCKET, TRACKER_RUNNING
+# Largest possible UDP payload, so multi-group datagrams are never truncated
+MAX_DATAGRAM = 65535
+
+# Latest value per group id, written by the socket thread and swapped out by the timer.
+# Each write replaces the previous value of its group, so nothing queues up between ticks
+# and groups sent in separate datagrams are all kept.
+TRACKER_MAILBOX = {}    # group id -> (x, y, receive time, sender time or None)
+MAILBOX_LOCK = threading.Lock()
+
+# Legacy {"x": .., "y": ..} payloads drive the active group of every object,
+# or of the source's object as "_ACTIVE_GROUP_:<object>"
+ACTIVE_GROUP = "_ACTIVE_GROUP_"
+
+def post_values(values, stamp):
+    # values: iterable of (group id, x, y, sender time or None)
+    posted = 0
+    coalesced = 0
+    with MAILBOX_LOCK:
+        mailbox = TRACKER_MAILBOX
+        for group_id, x, y, sent in values:
+            if group_id in mailbox:
+                coalesced += 1
+            mailbox[group_id] = (x, y, stamp, sent)
+            posted += 1
+    stats.add("values", posted)
+    stats.add("coalesced", coalesced)
+
+def take_mailbox():
+    global TRACKER_MAILBOX
+    with MAILBOX_LOCK:
+        values = TRACKER_MAILBOX
+        TRACKER_MAILBOX = {}
+    return values
+
+# GET_GROUPS replies, prebuilt on the main thread so the socket thread can answer
+# immediately. Replaced as a whole: (registry routes version, {source prefix: [datagrams]}).
+GROUPS_REPLY = (-1, {})
+# Group id prefixes of the sources being served, "" for sources that send full ids
+TRACKER_PREFIXES = {""}
+
+# Keeps each reply datagram under a typical Ethernet MTU so it is never fragmented
+MAX_REPLY = 1200
+
+def encode_groups_reply(version, names):
+    # Splits the group list into as many datagrams as needed. Every part repeats the
+    # version, so clients can match parts and skip lists they already have.
+    header = len(json.dumps({"type": "GROUPS", "version": version, "part": 0, "parts": 0, "groups": []})) + 16
+    chunks = [[]]
+    size = header
+    for name in names:
+        cost = len(json.dumps(name)) + 2
+        if chunks[-1] and size + cost > MAX_REPLY:
+            chunks.append([])
+            size = header
+        chunks[-1].append(name)
+        size += cost
+    return [
+        json.dumps({"type": "GROUPS", "version": version, "part": i, "parts": len(chunks), "groups": chunk}).encode('utf-8')
+        for i, chunk in enumerate(chunks)
+    ]
+
+def update_groups_reply():
+    global GROUPS_REPLY
+    version = registry.routes_version()
+    if version != GROUPS_REPLY[0]:
+        names = sorted(registry.routes())
+        replies = {}
+        for prefix in TRACKER_PREFIXES:
+            # Sources bound to an object list that object's groups without the prefix
+            replies[prefix] = encode_groups_reply(version, [n[len(prefix):] for n in names if n.startswith(prefix)])
+        GROUPS_REPLY = (version, replies)
+
+def send_groups(message, peer):
+    version, replies = GROUPS_REPLY
+    if message.get("version") == version:
+        peer.send(json.dumps({"type": "GROUPS", "version": version, "unchanged": True}).encode('utf-8'))
+        return
+    for datagram in replies.get(peer.prefix, ()):
+        peer.send(datagram)
+
+# Length prefix of every message on TCP and Unix socket sources
+STREAM_LENGTH = struct.Struct("<I")
+# Larger stream messages are treated as a corrupt stream and close the connection
+MAX_MESSAGE = 1 << 20
+
+class Peer:
+    # One tracker: a UDP sender address, or an accepted stream connection
+    __slots__ = ("sock", "addr", "stream", "prefix", "active", "table", "buffer")
+
+    def __init__(self, sock, addr, source, stream=False):
+        self.sock = sock
+        self.addr = addr
+        self.stream = stream
+        self.prefix = source["prefix"]
+        self.active = source["active"]
+        # Binary protocol group table: {id: group id string}
+        self.table = None
+        self.buffer = bytearray()
+
+    def send(self, data):
+        if self.sock is None:
+            # Replayed peer, nobody is listening
+            return
+        if self.stream:
+            message = STREAM_LENGTH.pack(len(data)) + data
+            # Non-blocking: a full send buffer raises before anything is sent
+            sent = self.sock.send(message)
+            if sent != len(message):
+                # The rest of a partial message would desync the client's framing for
+                # good. The selector sees the shutdown as EOF and drops the connection.
+                self.sock.shutdown(socket.SHUT_RDWR)
+                raise BlockingIOError(f"partial send to {self.addr}, connection closed")
+        else:
+            self.sock.sendto(data, self.addr)
+
+def handle_binary(data, peer, stamp):
+    view = memoryview(data)
+    msg_type, flags, count = wire.decode_header(view)
+    if msg_type == wire.MSG_GROUP_TABLE:
+        prefix = peer.prefix
+        peer.table = {k: prefix + v for k, v in wire.decode_group_table(view, count).items()}
+        peer.send(wire.encode_table_ack(len(peer.table)))
+    elif msg_type == wire.MSG_FRAME:
+        table = peer.table
+        if table is None:
+            raise wire.WireError("frame before group table")
+        sent = wire.decode_frame_time(view, flags)
+        post_values(
+            ((table[group_id], x, y, sent) for group_id, x, y in wire.decode_frame(view, count, flags) if group_id in table),
+            stamp
+        )
+    else:
+        raise wire.WireError(f"unexpected message type {msg_type}")
+
+def handle_message(data, peer, stamp):
+    if wire.is_binary(data):
+        handle_binary(data, peer, stamp)
+        return
+    message = json.loads(data.decode('utf-8'))
+
+    # Check for special commands like GET_GROUPS
+    if "type" in message and message["type"] == "GET_GROUPS":
+        send_groups(message, peer)
+        return
+
+    # Support old format {"x": 0.5, "y": 0.2} and new format {"Mouth": {"x": 0.5, "y": 0.2}}
+    # Either may carry a sender timestamp "t" in seconds, per message or per group
+    sent = message.get("t")
+    if sent is not None:
+        sent = float(sent)
+    if "x" in message and "y" in message:
+        post_values(((peer.active, float(message["x"]), float(message["y"]), sent),), stamp)
+    else:
+        # Expecting dictionary of groups
+        prefix = peer.prefix
+        post_values(
+            [(prefix + k, float(v["x"]), float(v["y"]), float(v["t"]) if "t" in v else sent)
+             for k, v in message.items()
+             if isinstance(v, dict) and "x" in v and "y" in v],
+            stamp
+        )
+
+def open_source(kind, port=0, path="", target=""):
+    # Binds one source on the main thread, so errors surface before the server starts.
+    # target routes the source's group names to that object's groups.
+    if kind == 'UDP':
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.bind(("0.0.0.0", port))
+    elif kind == 'TCP':
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind(("0.0.0.0", port))
+        sock.listen()
+    elif kind == 'UNIX':
+        if not hasattr(socket, "AF_UNIX"):
+            raise OSError("Unix sockets are not supported on this platform")
+        if os.path.exists(path) and stat.S_ISSOCK(os.stat(path).st_mode):
+            # Left behind by a session that did not shut down cleanly
+            os.unlink(path)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.bind(path)
+        sock.listen()
+    else:
+        raise ValueError(f"unknown source type {kind}")
+    sock.setblocking(False)
+    return {
+        "kind": kind,
+        "sock": sock,
+        "path": path if kind == 'UNIX' else "",
+        "prefix": f"{target}_" if target else "",
+        "active": f"{ACTIVE_GROUP}:{target}" if target else ACTIVE_GROUP,
+        "peers": {},
+    }
+
+def close_source(source):
+    try:
+        source["sock"].close()
+    except OSError:
+        pass
+    if source["path"]:
+        try:
+            os.unlink(source["path"])
+        except OSError:
+            pass
+
+def dispatch(data, peer, stamp):
+    log = TRACKER_RECORDER
+    if log is not None and peer.sock is not None:
+        log.write(peer, data, stamp)
+    stats.record_packet(stamp)
     try:
-        TRACKER_SOCKET = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        TRACKER_SOCKET.bind(("0.0.0.0", port))
-        TRACKER_SOCKET.settimeout(1.0)
+        handle_message(data, peer, stamp)
+    except OSError as e:
+        stats.record_error("send_errors", e)
     except Exception as e:
-        print(f"ShapeKey Tracker Error: {e}")
-        TRACKER_RUNNING = False
-        return
+        # Anything a malformed message raises (OverflowError, RecursionError, ...)
+        # must not take the server thread down with it
+        stats.record_error("parse_errors", e)
 
-    while TRACKER_RUNNING:
+def read_datagrams(source):
+    # Drains everything queued on the socket, so a burst costs one wake-up
+    sock = source["sock"]
+    peers = source["peers"]
+    while True:
         try:
-            data, addr = TRACKER_SOCKET.recvfrom(1024)
-            message = json.loads(data.decode('utf-8'))
-            
-            # Check for special commands like GET_GROUPS
-            if "type" in message and message["type"] == "GET_GROUPS":
-                TRACKER_QUEUE.put({"_GET_GROUPS_REQUEST_": addr})
-                continue
+            data, addr = sock.recvfrom(MAX_DATAGRAM)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            # Windows reports ICMP port unreachable for earlier replies as a reset
+            return
+        stamp = time.perf_counter()
+        peer = peers.get(addr)
+        if peer is None:
+            peer = peers[addr] = Peer(sock, addr, source)
+        dispatch(data, peer, stamp)
 
-            # Support old format {"x": 0.5, "y": 0.2} and new format {"Mouth": {"x": 0.5, "y": 0.2}}
-            elif "x" in message and "y" in message:
-                TRACKER_QUEUE.put({"_ACTIVE_GROUP_": {"x": float(message["x"]), "y": float(message["y"])}})
-            else:
-                # Expecting dictionary of groups
-                parsed_msg = {}
-                for k, v in message.items():
-                    if isinstance(v, dict) and "x" in v and "y" in v:
-                        parsed_msg[k] = {"x": float(v["x"]), "y": float(v["y"])}
-                if parsed_msg:
-                    TRACKER_QUEUE.put(parsed_msg)
-        except socket.timeout:
-            continue
-        except Exception as e:
-            # Ignore malformed JSON or other unexpected data
-            pass
+def accept_peer(selector, source):
+    try:
+        conn, addr = source["sock"].accept()
+    except OSError:
+        return
+    conn.setblocking(False)
+    selector.register(conn, selectors.EVENT_READ, Peer(conn, addr, source, stream=True))
 
+def read_stream(selector, peer):
     try:
-        TRACKER_SOCKET.close()
-    except:
-        pass
+        chunk = peer.sock.recv(MAX_DATAGRAM)
+    except (BlockingIOError, InterruptedError):
+        return
+    except OSError:
+        chunk = b""
+    if not chunk:
+        selector.unregister(peer.sock)
+        peer.sock.close()
+        return
+    stamp = time.perf_counter()
+    buffer = peer.buffer
+    buffer += chunk
+    offset = 0
+    while len(buffer) - offset >= STREAM_LENGTH.size:
+        length = STREAM_LENGTH.unpack_from(buffer, offset)[0]
+        if length > MAX_MESSAGE:
+            stats.add("dropped")
+            selector.unregister(peer.sock)
+            peer.sock.close()
+            return
+        start = offset + STREAM_LENGTH.size
+        if start + length > len(buffer):
+            break
+        dispatch(bytes(buffer[start:start + length]), peer, stamp)
+        offset = start + length
+    del buffer[:offset]
+
+def server_thread(sources, wake):
+    # Serves every source from one selector. wake becomes readable when stop_tracker()
+    # is called, so shutdown never waits on a socket timeout.
+    selector = selectors.DefaultSelector()
+    selector.register(wake, selectors.EVENT_READ)
+    for source in sources:
+        selector.register(source["sock"], selectors.EVENT_READ, source)
+
+    try:
+        while TRACKER_RUNNING:
+            for key, _ in selector.select():
+                data = key.data
+                if data is None:
+                    # Wake-up byte, the loop condition decides
+                    try:
+                        wake.recv(64)
+                    except OSError:
+                        pass
+                elif isinstance(data, Peer):
+                    read_stream(selector, data)
+                elif data["kind"] == 'UDP':
+                    read_datagrams(data)
+                else:
+                    accept_peer(selector, data)
+    finally:
+        for key in list(selector.get_map().values()):
+            if isinstance(key.data, Peer):
+                key.fileobj.close()
+        selector.close()
+        for source in sources:
+            close_source(source)
+        wake.close()
+
+def apply_group(obj, group, x, y):
+    # Returns False when the group already shows this value. A tracker repeating a
+    # static pose then causes no RNA writes, so idle ticks trigger no depsgraph updates.
+    x = max(-1.0, min(1.0, x))
+    y = max(-1.0, min(1.0, y))
+    limit = get_limit(group)
+    if (abs(group.joy_x - x) <= WRITE_TOLERANCE and abs(group.joy_y - y) <= WRITE_TOLERANCE
+            and is_applied(group, limit)):
+        return False
+    # Property update callbacks would evaluate the rig and redraw once per assignment
+    HUD_STATE["suspend_updates"] = True
+    try:
+        group.joy_x = x
+        group.joy_y = y
+    finally:
+        HUD_STATE["suspend_updates"] = False
+    update_transforms(obj, group, limit)
+    return True
+
+def resolve_values(values):
+    # Yields (obj, group, value) for a mailbox swap in O(groups in it) through the
+    # registry's routing table. Unrouted group ids yield (None, None, value).
+    for group_id, value in values.items():
+        if group_id.startswith(ACTIVE_GROUP):
+            # Handle legacy single tracking for active group
+            target = group_id[len(ACTIVE_GROUP) + 1:]
+            for obj in registry.controlled_objects():
+                if target and obj.name != target:
+                    continue
+                index = obj.bone_xy_group_index
+                if 0 <= index < len(obj.bone_xy_groups):
+                    yield obj, obj.bone_xy_groups[index], value
+            continue
+        obj, group = registry.resolve_route(group_id)
+        yield obj, group, value
+
+def apply_values(values):
+    applied = 0
+    for obj, group, value in resolve_values(values):
+        if group is not None:
+            if apply_group(obj, group, value[0], value[1]):
+                applied += 1
+        else:
+            stats.add("unrouted")
+    stats.add("applied", applied)
+    return applied
+
+def tag_redraw():
+    wm = bpy.context.window_manager
+    if wm is None:
+        return
+    for window in wm.windows:
+        for area in window.screen.areas:
+            if area.type == 'VIEW_3D':
+                area.tag_redraw()
+
+# Adaptive mode backs off towards this interval while no packets arrive
+IDLE_INTERVAL = 0.1
+LATENCY_SMOOTHING = 0.1
+
+TRACKER_TIMING = {
+    "interval": IDLE_INTERVAL,
+    "latency": 0.0,     # smoothed packet receive -> apply delay, seconds
+}
+
+# Jitter buffers per group id, used while smoothing is enabled
+TRACKER_JITTER = {}
+
+def next_interval(scene, flowing):
+    rate = getattr(scene, "bone_xy_tracker_rate", 60)
+    interval = 1.0 / max(1, rate)
+    if getattr(scene, "bone_xy_tracker_adaptive", False) and not flowing:
+        # Back off towards IDLE_INTERVAL, but never poll faster than the configured rate
+        interval = max(interval, min(TRACKER_TIMING["interval"] * 2.0, IDLE_INTERVAL))
+    TRACKER_TIMING["interval"] = interval
+    return interval
+
+def measure_latency(values, now):
+    if not values:
+        return
+    delays = [now - value[2] for value in values.values()]
+    stats.record_latency(delays)
+    delay = sum(delays) / len(delays)
+    TRACKER_TIMING["latency"] += (delay - TRACKER_TIMING["latency"]) * LATENCY_SMOOTHING
 
 def process_tracker_queue():
     if not TRACKER_RUNNING:
         return None  # Stop blender timer
 
-    if not TRACKER_QUEUE.empty():
-        # Consume all to get the most recent message (avoids lag)
-        latest_msg = None
-        while not TRACKER_QUEUE.empty():
-            latest_msg = TRACKER_QUEUE.get()
-        
-        if latest_msg:
-            # Check context
-            if getattr(bpy.context, "scene", None) and hasattr(bpy.context.scene, "objects"):
-                for obj in bpy.data.objects:
-                    if hasattr(obj, 'bone_xy_groups') and getattr(obj, "bone_xy_groups", None):
-                        
-                        # Handle GET_GROUPS request
-                        if "_GET_GROUPS_REQUEST_" in latest_msg:
-                            addr = latest_msg["_GET_GROUPS_REQUEST_"]
-                            groups_set = set()
-                            for o in bpy.data.objects:
-                                if hasattr(o, 'bone_xy_groups') and getattr(o, "bone_xy_groups", None):
-                                    for g in o.bone_xy_groups:
-                                        groups_set.add(f"{o.name}_{g.name}")
-                            
-                            # Send back via socket
-                            if TRACKER_SOCKET:
-                                try:
-                                    response = json.dumps({"type": "GROUPS", "groups": list(groups_set)})
-                                    TRACKER_SOCKET.sendto(response.encode('utf-8'), addr)
-                                except Exception as e:
-                                    print(f"Error sending groups: {e}")
-                            
-                            continue # Process next object (though this handles all objects globally really, but safe to continue)
-                        
-                        # Handle legacy single tracking for active group
-                        elif "_ACTIVE_GROUP_" in latest_msg:
-                            index = obj.bone_xy_group_index
-                            if 0 <= index < len(obj.bone_xy_groups):
-                                group = obj.bone_xy_groups[index]
-                                group.joy_x = max(-1.0, min(1.0, latest_msg["_ACTIVE_GROUP_"]["x"]))
-                                group.joy_y = max(-1.0, min(1.0, latest_msg["_ACTIVE_GROUP_"]["y"]))
-                                limit = get_limit(group)
-                                update_transforms(obj, group, limit)
-                        
-                        # Handle multi-group dictionary payload
-                        else:
-                            for group in obj.bone_xy_groups:
-                                group_id = f"{obj.name}_{group.name}"
-                                if group_id in latest_msg:
-                                    group.joy_x = max(-1.0, min(1.0, latest_msg[group_id]["x"]))
-                                    group.joy_y = max(-1.0, min(1.0, latest_msg[group_id]["y"]))
-                                    limit = get_limit(group)
-                                    update_transforms(obj, group, limit)
-
-    return 0.05  # Run 20 times a second
-
-def start_tracker(port):
-    global TRACKER_THREAD, TRACKER_RUNNING
-    if TRACKER_RUNNING:
+    scene = getattr(bpy.context, "scene", None)
+    update_groups_reply()
+    values = take_mailbox()
+
+    now = time.perf_counter()
+    with stats.STATS_LOCK:
+        stats.TRACKER_STATS["queue_depth"] = len(values)
+    if TRACKER_RING is not None:
+        read = TRACKER_RING.read(values, now)
+        if read:
+            stats.record_packet(now, read)
+        if TRACKER_RING.dropped:
+            stats.add("dropped", TRACKER_RING.dropped)
+            TRACKER_RING.dropped = 0
+    if getattr(scene, "bone_xy_tracker_smoothing", False):
+        latency = scene.bone_xy_tracker_latency / 1000.0
+        targets = smooth_values(TRACKER_JITTER, values, now, latency)
+    else:
+        TRACKER_JITTER.clear()
+        targets = values
+
+    # Check context
+    if targets and scene and hasattr(scene, "objects"):
+        if apply_values(targets):
+            tag_redraw()
+    measure_latency(values, now)
+
+    if take.TAKE_STATE["active"] and scene:
+        # Takes keep the raw samples, their timestamps place them between frames
+        result = take.update_take(
+            ((obj, group, value) for obj, group, value in resolve_values(values) if group is not None),
+            now, scene
+        )
+        if result is not None:
+            tag_redraw()
+
+    # Buffers still interpolating count as incoming data
+    return next_interval(scene, bool(targets))
+
+def start_recording(path):
+    global TRACKER_RECORDER
+    if TRACKER_RECORDER is not None:
         return
+    try:
+        TRACKER_RECORDER = recorder.Recorder(path)
+    except OSError as e:
+        print(f"ShapeKey Tracker Error: {e}")
+
+def stop_recording():
+    global TRACKER_RECORDER
+    log = TRACKER_RECORDER
+    TRACKER_RECORDER = None
+    if log is not None:
+        log.close()
+
+def is_recording():
+    return TRACKER_RECORDER is not None
+
+# Replay progress, readable from the panel while the replay thread runs
+REPLAY_STATE = {
+    "running": False,
+    "messages": 0,
+    "elapsed": 0.0,
+    "error": "",
+}
+REPLAY_STOP = threading.Event()
+
+def replay_thread(path, speed):
+    # Feeds a session log through dispatch(), the same path live messages take.
+    # speed scales the recorded timing; 0 replays as fast as possible.
+    peers = {}
+    start = time.perf_counter()
+    count = 0
+    try:
+        for kind, peer_id, t, payload in recorder.read_log(path):
+            if REPLAY_STOP.is_set():
+                break
+            if kind == recorder.KIND_PEER:
+                prefix, active = recorder.decode_peer(payload)
+                peers[peer_id] = Peer(None, None, {"prefix": prefix, "active": active})
+                continue
+            peer = peers.get(peer_id)
+            if peer is None:
+                continue
+            if speed > 0.0:
+                delay = start + t / speed - time.perf_counter()
+                if delay > 0.0 and REPLAY_STOP.wait(delay):
+                    break
+            dispatch(payload, peer, time.perf_counter())
+            count += 1
+            REPLAY_STATE["messages"] = count
+    except (OSError, ValueError) as e:
+        REPLAY_STATE["error"] = str(e)
+    except Exception as e:
+        # Anything else would otherwise die silently with the thread
+        REPLAY_STATE["error"] = f"{type(e).__name__}: {e}"
+    finally:
+        REPLAY_STATE["elapsed"] = time.perf_counter() - start
+        REPLAY_STATE["running"] = False
+
+def start_replay(path, speed=1.0):
+    # Replays into the running session, or into a socket-less one started for it
+    if REPLAY_STATE["running"]:
+        return
+    if not TRACKER_RUNNING:
+        start_session()
+    REPLAY_STOP.clear()
+    REPLAY_STATE.update(running=True, messages=0, elapsed=0.0, error="")
+    threading.Thread(target=replay_thread, args=(path, speed), daemon=True).start()
+
+def stop_replay():
+    REPLAY_STOP.set()
+
+def start_session():
+    global TRACKER_RUNNING, GROUPS_REPLY
     TRACKER_RUNNING = True
-    TRACKER_THREAD = threading.Thread(target=udp_server_thread, args=(port,), daemon=True)
+    GROUPS_REPLY = (-1, {})
+    TRACKER_TIMING["interval"] = IDLE_INTERVAL
+    TRACKER_TIMING["latency"] = 0.0
+    TRACKER_JITTER.clear()
+    stats.reset()
+    update_groups_reply()
+
+    # Drop values left over from a previous session
+    take_mailbox()
+
+    # A quick stop/start can find the previous session's timer still registered
+    if not bpy.app.timers.is_registered(process_tracker_queue):
+        bpy.app.timers.register(process_tracker_queue)
+
+def start_tracker(port, extra_sources=()):
+    # Serves the UDP port plus extra_sources: (type, port, socket path, target object name)
+    global TRACKER_THREAD, TRACKER_WAKE, TRACKER_PREFIXES
+    if TRACKER_RUNNING:
+        return
+    sources = []
+    try:
+        sources.append(open_source('UDP', port))
+        for kind, extra_port, path, target in extra_sources:
+            sources.append(open_source(kind, extra_port, path, target))
+    except (OSError, ValueError) as e:
+        print(f"ShapeKey Tracker Error: {e}")
+        for source in sources:
+            close_source(source)
+        return
+    TRACKER_PREFIXES = {source["prefix"] for source in sources}
+    start_session()
+    wake, TRACKER_WAKE = socket.socketpair()
+    TRACKER_THREAD = threading.Thread(target=server_thread, args=(sources, wake), daemon=True)
     TRACKER_THREAD.start()
-    
-    # Clear queue
-    while not TRACKER_QUEUE.empty():
-        TRACKER_QUEUE.get()
-        
-    bpy.app.timers.register(process_tracker_queue)
+
+def start_ring(path):
+    global TRACKER_RING
+    if TRACKER_RUNNING:
+        return
+    try:
+        TRACKER_RING = RingReader(bpy.path.abspath(path) if path else None)
+    except (OSError, ValueError) as e:
+        print(f"ShapeKey Tracker Error: {e}")
+        return
+    start_session()
 
 def stop_tracker():
-    global TRACKER_RUNNING
+    global TRACKER_RUNNING, TRACKER_RING, TRACKER_WAKE, TRACKER_THREAD
     TRACKER_RUNNING = False
+    if take.TAKE_STATE["active"]:
+        take.commit_take()
+    stop_replay()
+    if TRACKER_RING is not None:
+        TRACKER_RING.close()
+        TRACKER_RING = None
+    if TRACKER_WAKE is not None:
+        try:
+            TRACKER_WAKE.send(b"\0")
+        except OSError:
+            pass
+        TRACKER_WAKE.close()
+        TRACKER_WAKE = None
+    if TRACKER_THREAD is not None:
+        # Returns almost immediately; once joined, the ports are free to bind again
+        TRACKER_THREAD.join(1.0)
+        TRACKER_THREAD = None
+    stop_recording()
 
 class bone_xy_OT_tracker_start(bpy.types.Operator):
     bl_idname = "bone_xy.tracker_start"
     bl_label = "Start Tracker"
-    bl_description = "Start listening for external tracker input on the specified UDP port"
+    bl_description = "Start listening for external tracker input on the selected transport"
     
     def execute(self, context):
-        port = context.scene.bone_xy_tracker_port
-        start_tracker(port)
+        scene = context.scene
+        if scene.bone_xy_tracker_transport == 'RING':
+            start_ring(scene.bone_xy_tracker_ring_path)
+            if not TRACKER_RUNNING:
+                self.report({'ERROR'}, "Could not open the shared-memory ring, see the console")
+                return {'CANCELLED'}
+        else:
+            extra = [
+                (source.kind, source.port, bpy.path.abspath(source.path), source.target.name if source.target else "")
+                for source in scene.bone_xy_tracker_sources
+            ]
+            start_tracker(scene.bone_xy_tracker_port, extra)
+            if not TRACKER_RUNNING:
+                self.report({'ERROR'}, "Could not open every tracker source, see the console")
+                return {'CANCELLED'}
         return {'FINISHED'}
 
 class bone_xy_OT_tracker_stop(bpy.types.Operator):
@@ -147,22 +638,170 @@ class bone_xy_OT_tracker_stop(bpy.types.Operator):
         stop_tracker()
         return {'FINISHED'}
 
+class bone_xy_OT_tracker_record(bpy.types.Operator):
+    bl_idname = "bone_xy.tracker_record"
+    bl_label = "Record Tracker Session"
+    bl_description = "Log every incoming tracker message to the session file, or stop logging"
+    
+    @classmethod
+    def poll(cls, context):
+        return TRACKER_THREAD is not None or is_recording()
+    
+    def execute(self, context):
+        if is_recording():
+            messages = TRACKER_RECORDER.messages
+            stop_recording()
+            self.report({'INFO'}, f"Recorded {messages} tracker messages")
+            return {'FINISHED'}
+        start_recording(bpy.path.abspath(context.scene.bone_xy_tracker_log_path))
+        if not is_recording():
+            self.report({'ERROR'}, "Could not open the session file, see the console")
+            return {'CANCELLED'}
+        return {'FINISHED'}
+
+class bone_xy_OT_tracker_replay(bpy.types.Operator):
+    bl_idname = "bone_xy.tracker_replay"
+    bl_label = "Replay Tracker Session"
+    bl_description = "Feed a recorded session file back through the tracker, or stop the replay"
+    
+    def execute(self, context):
+        if REPLAY_STATE["running"]:
+            stop_replay()
+            return {'FINISHED'}
+        scene = context.scene
+        start_replay(bpy.path.abspath(scene.bone_xy_tracker_log_path), scene.bone_xy_tracker_replay_speed)
+        return {'FINISHED'}
+
+class bone_xy_OT_tracker_take(bpy.types.Operator):
+    bl_idname = "bone_xy.tracker_take"
+    bl_label = "Record Take"
+    bl_description = ("Play the timeline and capture tracker input for every routed group, "
+                      "then key joy_x/joy_y in one bulk write when playback stops")
+    
+    @classmethod
+    def poll(cls, context):
+        return TRACKER_RUNNING
+    
+    def execute(self, context):
+        if take.TAKE_STATE["active"]:
+            groups, keys = take.commit_take()
+            self.report({'INFO'}, f"Take committed: {keys} keys on {groups} groups")
+            return {'FINISHED'}
+        take.start_take(context, context.scene.bone_xy_tracker_rate)
+        return {'FINISHED'}
+
+class bone_xy_PG_tracker_source(bpy.types.PropertyGroup):
+    kind: bpy.props.EnumProperty(
+        name="Type",
+        items=[
+            ('UDP', "UDP", "Datagrams on a UDP port"),
+            ('TCP', "TCP", "Length-prefixed messages on a TCP port"),
+            ('UNIX', "Unix", "Length-prefixed messages on a Unix domain socket")
+        ],
+        default='UDP'
+    )
+    port: bpy.props.IntProperty(name="Port", default=5001, min=1024, max=65535)
+    path: bpy.props.StringProperty(name="Socket", default="/tmp/bone_xy_tracker.sock", subtype='FILE_PATH')
+    target: bpy.props.PointerProperty(
+        name="Object", type=bpy.types.Object,
+        description="Route this source's group names to this object's groups. "
+                    "Empty expects full <object>_<group> ids"
+    )
+
+class bone_xy_OT_tracker_source_add(bpy.types.Operator):
+    bl_idname = "bone_xy.tracker_source_add"
+    bl_label = "Add Tracker Source"
+    bl_description = "Listen on another port or socket, e.g. one per performer"
+    
+    def execute(self, context):
+        sources = context.scene.bone_xy_tracker_sources
+        source = sources.add()
+        source.port = context.scene.bone_xy_tracker_port + len(sources)
+        return {'FINISHED'}
+
+class bone_xy_OT_tracker_source_remove(bpy.types.Operator):
+    bl_idname = "bone_xy.tracker_source_remove"
+    bl_label = "Remove Tracker Source"
+    
+    index: bpy.props.IntProperty()
+    
+    def execute(self, context):
+        sources = context.scene.bone_xy_tracker_sources
+        if 0 <= self.index < len(sources):
+            sources.remove(self.index)
+        return {'FINISHED'}
+
 def is_tracker_running():
     return TRACKER_RUNNING
 
+def tracker_latency():
+    return TRACKER_TIMING["latency"]
+
+classes = (
+    bone_xy_PG_tracker_source,
+    bone_xy_OT_tracker_source_add,
+    bone_xy_OT_tracker_source_remove,
+    bone_xy_OT_tracker_start,
+    bone_xy_OT_tracker_stop,
+    bone_xy_OT_tracker_record,
+    bone_xy_OT_tracker_replay,
+    bone_xy_OT_tracker_take,
+)
+
 def register():
-    bpy.utils.register_class(bone_xy_OT_tracker_start)
-    bpy.utils.register_class(bone_xy_OT_tracker_stop)
+    for cls in classes:
+        bpy.utils.register_class(cls)
+    bpy.types.Scene.bone_xy_tracker_sources = bpy.props.CollectionProperty(type=bone_xy_PG_tracker_source)
+    bpy.types.Scene.bone_xy_tracker_log_path = bpy.props.StringProperty(
+        name="Session File", default="//tracker_session.bxylog", subtype='FILE_PATH',
+        description="Log written while recording a tracker session, and read when replaying one"
+    )
+    bpy.types.Scene.bone_xy_tracker_replay_speed = bpy.props.FloatProperty(
+        name="Speed", default=1.0, min=0.0, soft_max=10.0,
+        description="Replay speed multiplier. 0 replays as fast as possible, as a repeatable throughput benchmark"
+    )
+    bpy.types.Scene.bone_xy_tracker_transport = bpy.props.EnumProperty(
+        name="Transport",
+        items=[
+            ('UDP', "UDP", "Receive tracker packets over the network"),
+            ('RING', "Shared Memory", "Read a tracker running on this machine from a memory-mapped ring buffer")
+        ],
+        default='UDP'
+    )
+    bpy.types.Scene.bone_xy_tracker_ring_path = bpy.props.StringProperty(
+        name="Ring File", default="", subtype='FILE_PATH',
+        description="Memory-mapped file shared with the tracker. Empty uses bone_xy_tracker.ring in the system temp folder"
+    )
     bpy.types.Scene.bone_xy_tracker_port = bpy.props.IntProperty(
         name="Port", default=5000, min=1024, max=65535,
         description="UDP Port to listen for tracking data"
     )
+    bpy.types.Scene.bone_xy_tracker_rate = bpy.props.IntProperty(
+        name="Apply Rate", default=60, min=1, max=240, subtype='FACTOR',
+        description="How many times per second tracker input is applied to the rig. Match your display refresh rate"
+    )
+    bpy.types.Scene.bone_xy_tracker_adaptive = bpy.props.BoolProperty(
+        name="Adaptive", default=True,
+        description="Poll less often while no tracker packets arrive, and at the full apply rate while they do"
+    )
+    bpy.types.Scene.bone_xy_tracker_smoothing = bpy.props.BoolProperty(
+        name="Smoothing", default=False,
+        description="Buffer tracker samples and interpolate between them, trading a fixed delay for steady motion"
+    )
+    bpy.types.Scene.bone_xy_tracker_latency = bpy.props.FloatProperty(
+        name="Latency Target", default=30.0, min=0.0, max=250.0,
+        description="How far behind the newest tracker sample the rig is driven, in milliseconds. "
+                    "Around two packet intervals absorbs most network jitter"
+    )
 
 def unregister():
     stop_tracker()
-    bpy.utils.unregister_class(bone_xy_OT_tracker_start)
-    bpy.utils.unregister_class(bone_xy_OT_tracker_stop)
-    if hasattr(bpy.types.Scene, "bone_xy_tracker_port"):
-        del bpy.types.Scene.bone_xy_tracker_port
+    for prop in ("bone_xy_tracker_sources", "bone_xy_tracker_log_path", "bone_xy_tracker_replay_speed", "bone_xy_tracker_transport", "bone_xy_tracker_ring_path",
+                 "bone_xy_tracker_port", "bone_xy_tracker_rate", "bone_xy_tracker_adaptive",
+                 "bone_xy_tracker_smoothing", "bone_xy_tracker_latency"):
+        if hasattr(bpy.types.Scene, prop):
+            delattr(bpy.types.Scene, prop)
+    for cls in reversed(classes):
+        bpy.utils.unregister_class(cls)
 
 
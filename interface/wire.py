@@ -0,0 +1,99 @@
+# Binary tracker protocol
+#
+# Every datagram starts with an 8 byte header:
+#   magic "BXY" | version u8 | type u8 | flags u8 | count u16   (little-endian)
+#
+# GROUP_TABLE  client -> server, sent once per session (and again whenever the client's groups change)
+#              count x (id u16 | name_len u8 | name utf-8)
+# TABLE_ACK    server -> client, count = number of entries that were accepted
+# FRAME        client -> server, [timestamp f64 if FLAG_TIMESTAMP] count x (id u16 | x f32 | y f32)
+#              The optional timestamp is the capture time in seconds on the sender's clock.
+#
+# JSON datagrams never start with the magic, so both formats share one socket.
+
+import struct
+
+MAGIC = b"BXY"
+VERSION = 1
+
+MSG_GROUP_TABLE = 1
+MSG_TABLE_ACK = 2
+MSG_FRAME = 3
+
+FLAG_TIMESTAMP = 0x01
+
+HEADER = struct.Struct("<3sBBBH")
+TABLE_ENTRY = struct.Struct("<HB")
+FRAME_ENTRY = struct.Struct("<Hff")
+FRAME_TIME = struct.Struct("<d")
+
+class WireError(ValueError):
+    pass
+
+def is_binary(data):
+    return data[:3] == MAGIC
+
+def encode_header(msg_type, count, flags=0):
+    return HEADER.pack(MAGIC, VERSION, msg_type, flags, count)
+
+def encode_group_table(names):
+    # names: iterable of (id, group id string)
+    parts = []
+    count = 0
+    for group_id, name in names:
+        raw = name.encode("utf-8")[:255]
+        parts.append(TABLE_ENTRY.pack(group_id, len(raw)))
+        parts.append(raw)
+        count += 1
+    return encode_header(MSG_GROUP_TABLE, count) + b"".join(parts)
+
+def encode_table_ack(count):
+    return encode_header(MSG_TABLE_ACK, count)
+
+def encode_frame(values, timestamp=None):
+    # values: iterable of (id, x, y)
+    body = b"".join(FRAME_ENTRY.pack(group_id, x, y) for group_id, x, y in values)
+    count = len(body) // FRAME_ENTRY.size
+    if timestamp is None:
+        return encode_header(MSG_FRAME, count) + body
+    return encode_header(MSG_FRAME, count, FLAG_TIMESTAMP) + FRAME_TIME.pack(timestamp) + body
+
+def decode_header(view):
+    if len(view) < HEADER.size:
+        raise WireError("truncated header")
+    magic, version, msg_type, flags, count = HEADER.unpack_from(view, 0)
+    if magic != MAGIC:
+        raise WireError("bad magic")
+    if version != VERSION:
+        raise WireError(f"unsupported version {version}")
+    return msg_type, flags, count
+
+def decode_group_table(view, count):
+    table = {}
+    offset = HEADER.size
+    for _ in range(count):
+        if offset + TABLE_ENTRY.size > len(view):
+            raise WireError("truncated group table")
+        group_id, name_len = TABLE_ENTRY.unpack_from(view, offset)
+        offset += TABLE_ENTRY.size
+        if offset + name_len > len(view):
+            raise WireError("truncated group name")
+        table[group_id] = bytes(view[offset:offset + name_len]).decode("utf-8")
+        offset += name_len
+    return table
+
+def decode_frame_time(view, flags):
+    # Sender timestamp of a frame, or None
+    if not flags & FLAG_TIMESTAMP:
+        return None
+    if HEADER.size + FRAME_TIME.size > len(view):
+        raise WireError("truncated frame timestamp")
+    return FRAME_TIME.unpack_from(view, HEADER.size)[0]
+
+def decode_frame(view, count, flags=0):
+    # Yields (id, x, y) straight from the datagram buffer
+    start = HEADER.size + (FRAME_TIME.size if flags & FLAG_TIMESTAMP else 0)
+    end = start + count * FRAME_ENTRY.size
+    if end > len(view):
+        raise WireError("truncated frame")
+    return FRAME_ENTRY.iter_unpack(view[start:end])
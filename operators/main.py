@@ -1,11 +1,14 @@
 import bpy
-import math
 import json
 import os
+import time
 from bpy_extras.io_utils import ExportHelper, ImportHelper
 from ..core.state import HUD_STATE
-from ..core.main import get_active_group, get_limit, update_transforms
-from ..ui.draw import draw_hud
+from ..core import registry
+from ..core.bake import bake_groups, reduce_targets
+from ..core.anim import align_samples, write_joystick_keys, mute_joystick_curves, unmute_joystick_curves, start_playback, stop_playback
+from ..core.main import get_active_group, get_limit, update_transforms, update_transforms_merged, keyframe_targets, invalidate_plans, invalidate_caches, limit_insert, limit_move
+from ..ui.draw import draw_hud, pick_target
 
 class bone_xy_OT_edit_values(bpy.types.Operator):
     bl_idname = "bone_xy.edit_values"
@@ -58,12 +61,11 @@ class bone_xy_OT_reset_all(bpy.types.Operator):
     bl_description = "Reset ALL joystick handles across EVERY group and EVERY object back to center (0.0, 0.0)"
     
     def execute(self, context):
-        for obj in context.scene.objects:
-            if hasattr(obj, 'bone_xy_groups'):
-                for group in obj.bone_xy_groups:
-                    group.joy_x = 0.0
-                    group.joy_y = 0.0
-                    update_transforms(obj, group, get_limit(group))
+        for obj in registry.controlled_objects(context.scene):
+            for group in obj.bone_xy_groups:
+                group.joy_x = 0.0
+                group.joy_y = 0.0
+                update_transforms(obj, group, get_limit(group))
         for window in context.window_manager.windows:
             for area in window.screen.areas:
                 if area.type == 'VIEW_3D':
@@ -94,54 +96,102 @@ class bone_xy_OT_bake_animation(bpy.types.Operator):
     start_frame: bpy.props.IntProperty(name="Start Frame", default=1)
     end_frame: bpy.props.IntProperty(name="End Frame", default=250)
     step: bpy.props.IntProperty(name="Step", default=1, min=1)
+    mode: bpy.props.EnumProperty(
+        name="Mode",
+        items=[
+            ('DIRECT', "Direct", "Sample the joystick F-Curves directly and write all keys in bulk"),
+            ('SCENE', "Scene Evaluation", "Step the scene frame by frame (slow, but picks up drivers and NLA)"),
+        ],
+        default='DIRECT'
+    )
+    scope: bpy.props.EnumProperty(
+        name="Bake",
+        items=[
+            ('GROUP', "Active Group", "Bake only the active group of the active object"),
+            ('OBJECT', "Active Object", "Bake every group of the active object"),
+            ('SELECTED', "Selected Objects", "Bake every group of every selected object"),
+            ('ALL', "All Objects", "Bake every group of every controlled object in the scene"),
+        ],
+        default='GROUP'
+    )
+    reduce_keys: bpy.props.BoolProperty(
+        name="Reduce Keys",
+        description="Drop keys that linear interpolation can reproduce within the tolerances below",
+        default=False
+    )
+    tolerance_location: bpy.props.FloatProperty(name="Location Tolerance", default=0.0001, min=0.0, precision=5)
+    tolerance_rotation: bpy.props.FloatProperty(name="Rotation Tolerance", default=0.0005, min=0.0, subtype='ANGLE', precision=4)
+    tolerance_scale: bpy.props.FloatProperty(name="Scale Tolerance", default=0.0001, min=0.0, precision=5)
     
     def invoke(self, context, event):
         self.start_frame = context.scene.frame_start
         self.end_frame = context.scene.frame_end
         return context.window_manager.invoke_props_dialog(self)
         
-    def execute(self, context):
+    def collect_groups(self, context):
         obj = context.active_object
-        group = get_active_group(obj)
-        if not group or not hasattr(group, 'bone_xy_list'):
+        if self.scope == 'GROUP':
+            group = get_active_group(obj)
+            return [(obj, group)] if group else []
+        if self.scope == 'OBJECT':
+            objects = [obj] if obj else []
+        elif self.scope == 'SELECTED':
+            objects = [o for o in registry.controlled_objects(context.scene) if o.select_get()]
+        else:
+            objects = registry.controlled_objects(context.scene)
+        return [(o, group) for o in objects for group in o.bone_xy_groups]
+        
+    def execute(self, context):
+        pairs = self.collect_groups(context)
+        if not pairs:
             return {'CANCELLED'}
             
+        tolerances = None
+        if self.reduce_keys:
+            tolerances = {
+                "location": self.tolerance_location,
+                "rotation_euler": self.tolerance_rotation,
+                "scale": self.tolerance_scale,
+            }
+            
+        if self.mode == 'DIRECT':
+            # Groups that drive the same channel are summed into one curve
+            count, total = bake_groups(pairs, self.start_frame, self.end_frame, self.step, tolerances)
+            self.report_count(count, total, len(pairs))
+            return {'FINISHED'}
+            
         original_frame = context.scene.frame_current
         
-        limit = get_limit(group)
+        limits = [get_limit(group) for obj, group in pairs]
+        
+        targets_to_keyframe = set()
+        for obj, group in pairs:
+            targets_to_keyframe |= keyframe_targets(obj, group)
         
         count = 0
         for f in range(self.start_frame, self.end_frame + 1, self.step):
             context.scene.frame_set(f)
-            update_transforms(obj, group, limit)
-            
-            targets_to_keyframe = set()
-            
-            for item in group.bone_xy_list:
-                target = None
-                if item.target_type == 'BONE' and obj.type == 'ARMATURE':
-                    if item.bone_name and item.bone_name in obj.pose.bones:
-                        target = obj.pose.bones[item.bone_name]
-                elif item.target_type == 'OBJECT':
-                    target = obj
-                    
-                if target:
-                    if item.prop_type == 'LOCATION':
-                        path = "location"
-                    elif item.prop_type == 'ROTATION':
-                        path = "rotation_euler"
-                    elif item.prop_type == 'SCALE':
-                        path = "scale"
-                    
-                    targets_to_keyframe.add((target, path))
+            # Groups that drive the same channel are summed, as in Direct mode
+            update_transforms_merged(pairs, limits)
             
             for t_obj, p_path in targets_to_keyframe:
                 t_obj.keyframe_insert(data_path=p_path, frame=f)
                 count += 1
                 
         context.scene.frame_set(original_frame)
-        self.report({'INFO'}, f"Baked {count} keyframes from frame {self.start_frame} to {self.end_frame}")
+        
+        if tolerances is not None:
+            count, total = reduce_targets(targets_to_keyframe, self.start_frame, self.end_frame, tolerances)
+            self.report_count(count, total, len(pairs))
+        else:
+            self.report({'INFO'}, f"Baked {count} keyframes from frame {self.start_frame} to {self.end_frame}")
         return {'FINISHED'}
+    
+    def report_count(self, count, total, group_count):
+        if count != total:
+            self.report({'INFO'}, f"Baked {count} keyframes ({total} before reduction) from {group_count} group(s), frame {self.start_frame} to {self.end_frame}")
+        else:
+            self.report({'INFO'}, f"Baked {count} keyframes from {group_count} group(s), frame {self.start_frame} to {self.end_frame}")
 
 class bone_xy_OT_export_group(bpy.types.Operator, ExportHelper):
     bl_idname = "bone_xy.export_group"
@@ -222,7 +272,9 @@ class bone_xy_OT_import_group(bpy.types.Operator, ImportHelper):
             item.radius = info.get("radius", 1.0)
             item.blend_mode = info.get("blend_mode", 'AUTO')
             count += 1
-            
+        
+        invalidate_caches()
+        registry.refresh(obj)
         self.report({'INFO'}, f"Imported new group with {count} mappings")
         return {'FINISHED'}
 
@@ -245,17 +297,156 @@ class bone_xy_OT_ui_joystick(bpy.types.Operator):
     bl_label = "Toggle Axis UI"
     bl_description = "Start or Stop the interactive 2D HUD Axis Controller in the 3D Viewport"
     
+    # Drag updates are applied at most once per display refresh
+    APPLY_INTERVAL = 1.0 / 60.0
+    HANDLED_EVENTS = {'MOUSEMOVE', 'INBETWEEN_MOUSEMOVE', 'LEFTMOUSE', 'RIGHTMOUSE', 'ESC', 'I', 'TIMER'}
+    
+    _timer = None
+    _region = None
+    _region_area = 0
+    _last_apply = 0.0
+    _pending = None
+    _record = None
+    
+    # Joystick-unit error allowed when decimating a recorded take
+    RECORD_TOLERANCE = 0.001
+    
+    def get_window_region(self, context):
+        # Regions of an area do not change while it exists, look it up once
+        area_ptr = context.area.as_pointer()
+        if self._region is None or self._region_area != area_ptr:
+            self._region = None
+            for region in context.area.regions:
+                if region.type == 'WINDOW':
+                    self._region = region
+                    break
+            self._region_area = area_ptr
+        return self._region
+    
+    def queue_drag(self, context, pending):
+        # Mouse events only record the latest drag position. It is applied right
+        # away if a refresh interval has passed, otherwise on the next TIMER tick.
+        self._pending = pending
+        if time.perf_counter() - self._last_apply >= self.APPLY_INTERVAL:
+            self.flush_drag(context)
+        elif self._timer is None:
+            self._timer = context.window_manager.event_timer_add(self.APPLY_INTERVAL, window=context.window)
+    
+    def flush_drag(self, context):
+        pending = self._pending
+        self._pending = None
+        if pending is None:
+            return
+        self._last_apply = time.perf_counter()
+        
+        obj = context.active_object
+        group = get_active_group(obj)
+        if not group:
+            return
+        
+        # Property update callbacks would evaluate the rig once per assignment
+        HUD_STATE["suspend_updates"] = True
+        try:
+            if pending[0] == 'JOY':
+                group.joy_x = pending[1]
+                group.joy_y = pending[2]
+            else:
+                idx = pending[1]
+                if 0 <= idx < len(group.bone_xy_list):
+                    item = group.bone_xy_list[idx]
+                    item.target_x = pending[2]
+                    item.target_y = pending[3]
+        finally:
+            HUD_STATE["suspend_updates"] = False
+        
+        update_transforms(obj, group, get_limit(group))
+        
+        if pending[0] == 'JOY' and context.scene.tool_settings.use_keyframe_insert_auto:
+            if self._record is not None:
+                self.record_sample(context, pending[1], pending[2])
+            else:
+                group.keyframe_insert(data_path="joy_x")
+                group.keyframe_insert(data_path="joy_y")
+        
+        context.area.tag_redraw()
+    
+    def start_recording(self, context, obj, group):
+        # Buffered auto-key: samples stay in memory during the drag and are
+        # committed as frame-aligned keys in one bulk write on release.
+        base = group.path_from_id()
+        muted = mute_joystick_curves(obj, base)
+        started_playback = context.scene.bone_xy_record_playback and start_playback(context.screen)
+        
+        self._record = {
+            "obj": obj,
+            "group_path": base,
+            "samples": [],
+            "muted": muted,
+            "started_playback": started_playback,
+        }
+        self.record_sample(context, group.joy_x, group.joy_y)
+        if self._timer is None:
+            self._timer = context.window_manager.event_timer_add(self.APPLY_INTERVAL, window=context.window)
+    
+    def record_sample(self, context, joy_x, joy_y):
+        self._record["samples"].append((time.perf_counter(), context.scene.frame_current_final, joy_x, joy_y))
+    
+    def commit_recording(self, context):
+        record = self._record
+        self._record = None
+        stop_playback(record["started_playback"], context.screen.is_animation_playing)
+        
+        obj = record["obj"]
+        try:
+            # Unmute first, the curves outlive a removed group
+            unmute_joystick_curves(obj, record["group_path"], record["muted"])
+            group = obj.path_resolve(record["group_path"])
+        except (ValueError, ReferenceError):
+            return
+        
+        samples = record["samples"]
+        if not samples:
+            return
+        _, frames, xs, ys = zip(*samples)
+        frames, xs, ys = align_samples(frames, xs, ys)
+        write_joystick_keys(obj, group, frames, xs, ys, self.RECORD_TOLERANCE)
+    
+    def end_drag(self, context):
+        self.flush_drag(context)
+        if self._record is not None:
+            self.commit_recording(context)
+        self.remove_timer(context)
+        HUD_STATE["dragging"] = False
+        HUD_STATE["dragging_hud"] = False
+        HUD_STATE["dragging_target_idx"] = -1
+        context.area.tag_redraw()
+    
+    def remove_timer(self, context):
+        if self._timer is not None:
+            context.window_manager.event_timer_remove(self._timer)
+            self._timer = None
+    
     def modal(self, context, event):
         if not HUD_STATE["running"]:
             self.finish(context)
             return {'CANCELLED'}
             
-        window_region = None
-        for region in context.area.regions:
-            if region.type == 'WINDOW':
-                window_region = region
-                break
-                
+        if event.type not in self.HANDLED_EVENTS:
+            return {'PASS_THROUGH'}
+            
+        if event.type == 'TIMER':
+            if self._pending is not None:
+                self.flush_drag(context)
+            elif self._record is not None:
+                # Holding still during playback still records the held value every frame
+                samples = self._record["samples"]
+                if samples and samples[-1][1] != context.scene.frame_current_final:
+                    self.record_sample(context, samples[-1][2], samples[-1][3])
+            elif not (HUD_STATE["dragging"] or HUD_STATE.get("dragging_target_idx", -1) >= 0):
+                self.remove_timer(context)
+            return {'PASS_THROUGH'}
+            
+        window_region = self.get_window_region(context)
         if not window_region:
             return {'PASS_THROUGH'}
             
@@ -280,15 +471,6 @@ class bone_xy_OT_ui_joystick(bpy.types.Operator):
             if group:
                 update_transforms(obj, group, limit)
             context.area.tag_redraw()
-            
-        is_in_window = (window_region.x <= event.mouse_x <= window_region.x + window_region.width and
-                        window_region.y <= event.mouse_y <= window_region.y + window_region.height)
-        
-        x, y, size = HUD_STATE["x"], HUD_STATE["y"], HUD_STATE["size"]
-        
-        obj = context.active_object
-        group = get_active_group(obj)
-        limit = get_limit(group) if group else 1.0
 
         if is_in_window:
             mx = event.mouse_x - window_region.x
@@ -312,14 +494,11 @@ class bone_xy_OT_ui_joystick(bpy.types.Operator):
         if event.type == 'LEFTMOUSE':
             if event.value == 'PRESS':
                 if is_in_window and obj and obj.type == 'MESH' and group and hasattr(group, 'bone_xy_list') and context.scene.bone_xy_allow_drag:
-                    cx, cy = x + size/2, y + size/2
-                    for idx, item in enumerate(group.bone_xy_list):
-                        px = cx + (item.target_x / limit) * (size/2)
-                        py = cy + (item.target_y / limit) * (size/2)
-                        if math.hypot(mx - px, my - py) < 12:
-                            HUD_STATE["dragging_target_idx"] = idx
-                            HUD_STATE["drag_start_limit"] = limit
-                            return {'RUNNING_MODAL'}
+                    idx = pick_target(group, limit, mx, my)
+                    if idx >= 0:
+                        HUD_STATE["dragging_target_idx"] = idx
+                        HUD_STATE["drag_start_limit"] = limit
+                        return {'RUNNING_MODAL'}
 
                 if in_header:
                     HUD_STATE["dragging_hud"] = True
@@ -328,6 +507,8 @@ class bone_xy_OT_ui_joystick(bpy.types.Operator):
                     return {'RUNNING_MODAL'}
                 elif in_joy and group:
                     HUD_STATE["dragging"] = True
+                    if context.scene.tool_settings.use_keyframe_insert_auto and context.scene.bone_xy_record_buffered:
+                        self.start_recording(context, obj, group)
                     return {'RUNNING_MODAL'}
                 elif in_reset:
                     bpy.ops.bone_xy.reset_handle()
@@ -351,16 +532,11 @@ class bone_xy_OT_ui_joystick(bpy.types.Operator):
                     return {'RUNNING_MODAL'}
 
         if event.type == 'LEFTMOUSE' and event.value == 'RELEASE':
-            HUD_STATE["dragging"] = False
-            HUD_STATE["dragging_hud"] = False
-            HUD_STATE["dragging_target_idx"] = -1
-            context.area.tag_redraw()
+            self.end_drag(context)
         
-        if event.type == 'MOUSEMOVE':
+        if event.type in {'MOUSEMOVE', 'INBETWEEN_MOUSEMOVE'}:
             if HUD_STATE.get("dragging_target_idx", -1) >= 0:
-                idx = HUD_STATE["dragging_target_idx"]
-                if group and 0 <= idx < len(group.bone_xy_list):
-                    item = group.bone_xy_list[idx]
+                if group:
                     cx, cy = x + size/2, y + size/2
                     drag_limit = HUD_STATE.get("drag_start_limit", 1.0)
                     
@@ -370,9 +546,7 @@ class bone_xy_OT_ui_joystick(bpy.types.Operator):
                     new_tx = max(-drag_limit, min(drag_limit, new_tx))
                     new_ty = max(-drag_limit, min(drag_limit, new_ty))
                     
-                    item.target_x = new_tx
-                    item.target_y = new_ty
-                context.area.tag_redraw()
+                    self.queue_drag(context, ('TARGET', HUD_STATE["dragging_target_idx"], new_tx, new_ty))
                 return {'RUNNING_MODAL'}
 
             elif HUD_STATE.get("dragging_hud", False):
@@ -384,24 +558,20 @@ class bone_xy_OT_ui_joystick(bpy.types.Operator):
             elif HUD_STATE["dragging"] and group:
                 cx = (mx - (x + size/2)) / (size/2)
                 cy = (my - (y + size/2)) / (size/2)
-                group.joy_x = max(-1.0, min(1.0, cx))
-                group.joy_y = max(-1.0, min(1.0, cy))
-                
-                update_transforms(obj, group, limit)
-                
-                if context.scene.tool_settings.use_keyframe_insert_auto:
-                    group.keyframe_insert(data_path="joy_x")
-                    group.keyframe_insert(data_path="joy_y")
-                
-                context.area.tag_redraw()
+                self.queue_drag(context, ('JOY', max(-1.0, min(1.0, cx)), max(-1.0, min(1.0, cy))))
                 return {'RUNNING_MODAL'}
+            
+            # Hover highlight for draggable target points
+            hover = -1
+            if in_joy and obj and obj.type == 'MESH' and group and context.scene.bone_xy_allow_drag:
+                hover = pick_target(group, limit, mx, my)
+            if hover != HUD_STATE.get("hover_target_idx", -1):
+                HUD_STATE["hover_target_idx"] = hover
+                context.area.tag_redraw()
         
         if event.type in {'RIGHTMOUSE', 'ESC'}:
             if HUD_STATE["dragging"] or HUD_STATE.get("dragging_target_idx", -1) >= 0 or HUD_STATE.get("dragging_hud", False):
-                HUD_STATE["dragging"] = False
-                HUD_STATE["dragging_hud"] = False
-                HUD_STATE["dragging_target_idx"] = -1
-                context.area.tag_redraw()
+                self.end_drag(context)
                 return {'RUNNING_MODAL'}
         
         return {'PASS_THROUGH'}
@@ -417,6 +587,9 @@ class bone_xy_OT_ui_joystick(bpy.types.Operator):
         return {'RUNNING_MODAL'}
         
     def finish(self, context):
+        if self._record is not None:
+            self.commit_recording(context)
+        self.remove_timer(context)
         if HUD_STATE["handle"]:
             bpy.types.SpaceView3D.draw_handler_remove(HUD_STATE["handle"], 'WINDOW')
             HUD_STATE["handle"] = None
@@ -437,6 +610,8 @@ class bone_xy_OT_move_item(bpy.types.Operator):
             if 0 <= new_idx < len(group.bone_xy_list):
                 group.bone_xy_list.move(idx, new_idx)
                 group.bone_xy_index = new_idx
+                invalidate_plans(group)
+                limit_move(group, idx, new_idx)
         return {'FINISHED'}
 
 class bone_xy_OT_mirror_mappings(bpy.types.Operator):
@@ -492,9 +667,11 @@ class bone_xy_OT_mirror_mappings(bpy.types.Operator):
             new_item.target_y = info['target_y']
             new_item.radius = info['radius']
             new_item.blend_mode = info['blend_mode']
+            limit_insert(group, len(group.bone_xy_list) - 1, new_item.target_x, new_item.target_y)
             count += 1
             
         group.bone_xy_index = len(group.bone_xy_list) - 1
+        invalidate_plans(group)
         self.report({'INFO'}, f"Auto-Mirrored {count} Bones")
         return {'FINISHED'}
 
@@ -513,6 +690,8 @@ class bone_xy_OT_move_group(bpy.types.Operator):
             if 0 <= new_idx < len(obj.bone_xy_groups):
                 obj.bone_xy_groups.move(idx, new_idx)
                 obj.bone_xy_group_index = new_idx
+                invalidate_caches()
+                registry.refresh(obj)
         return {'FINISHED'}
 
 class bone_xy_OT_move_preset(bpy.types.Operator):
@@ -569,14 +748,13 @@ class bone_xy_OT_set_preset(bpy.types.Operator):
             preset = presets[idx]
             preset.states.clear()
             
-            for obj in context.scene.objects:
-                if hasattr(obj, 'bone_xy_groups'):
-                    for group in obj.bone_xy_groups:
-                        state = preset.states.add()
-                        state.obj_name = obj.name
-                        state.group_name = group.name
-                        state.joy_x = group.joy_x
-                        state.joy_y = group.joy_y
+            for obj in registry.controlled_objects(context.scene):
+                for group in obj.bone_xy_groups:
+                    state = preset.states.add()
+                    state.obj_name = obj.name
+                    state.group_name = group.name
+                    state.joy_x = group.joy_x
+                    state.joy_y = group.joy_y
         return {'FINISHED'}
 
 class bone_xy_OT_call_preset(bpy.types.Operator):
@@ -626,25 +804,7 @@ class bone_xy_OT_keyframe_preset(bpy.types.Operator):
                         group.joy_y = state.joy_y
                         update_transforms(obj, group, get_limit(group))
                         
-                        targets_to_keyframe = set()
-                        for item in group.bone_xy_list:
-                            target = None
-                            if item.target_type == 'BONE' and obj.type == 'ARMATURE':
-                                if item.bone_name and item.bone_name in obj.pose.bones:
-                                    target = obj.pose.bones[item.bone_name]
-                            elif item.target_type == 'OBJECT':
-                                target = obj
-                                
-                            if target:
-                                if item.prop_type == 'LOCATION':
-                                    path = "location"
-                                elif item.prop_type == 'ROTATION':
-                                    path = "rotation_euler"
-                                elif item.prop_type == 'SCALE':
-                                    path = "scale"
-                                targets_to_keyframe.add((target, path))
-                                
-                        for t_obj, p_path in targets_to_keyframe:
+                        for t_obj, p_path in keyframe_targets(obj, group):
                             t_obj.keyframe_insert(data_path=p_path)
             
             # Refresh Viewport
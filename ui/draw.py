@@ -1,10 +1,11 @@
 import bpy
 import math
 import gpu
+import numpy as np
 import blf
 from gpu_extras.batch import batch_for_shader
 from ..core.state import HUD_STATE
-from ..core.main import get_active_group, get_limit
+from ..core.main import get_active_group, get_limit, get_plan
 
 def get_shader():
     try:
@@ -12,6 +13,202 @@ def get_shader():
     except:
         return gpu.shader.from_builtin('UNIFORM_COLOR')
 
+# Cached GPU batches. Static panel geometry is rebuilt only when the HUD moves or
+# resizes, mapping geometry only when the group layout changes.
+_BATCH_CACHE = {
+    "static_key": None,
+    "under": [],
+    "over": [],
+    "dot": None,
+    "layout_key": None,
+    "layout_plan": None,
+    "circles": None,
+    "points": None,
+    "labels": [],
+}
+
+# Screen-space grid of the active group's target points, for picking and hover
+PICK_RADIUS = 12
+_PICK_INDEX = {
+    "key": None,
+    "plan": None,
+    "cells": {},
+    "points": [],
+}
+
+LABEL_SIZE = 12
+LABEL_OFFSET = 5
+# Width/height of label strings at LABEL_SIZE, measured once per name
+_TEXT_SIZES = {}
+
+_CIRCLE_SEGMENTS = 32
+_UNIT_COS = np.cos(np.arange(_CIRCLE_SEGMENTS + 1) / _CIRCLE_SEGMENTS * 2 * math.pi)
+_UNIT_SIN = np.sin(np.arange(_CIRCLE_SEGMENTS + 1) / _CIRCLE_SEGMENTS * 2 * math.pi)
+_POINT_QUAD = np.array(((-3, -3), (3, -3), (3, 3), (3, 3), (-3, 3), (-3, -3)), dtype=np.float32)
+
+def _quad(x0, y0, x1, y1):
+    return [(x0, y0), (x1, y0), (x1, y1), (x1, y1), (x0, y1), (x0, y0)]
+
+def _outline(x0, y0, x1, y1):
+    corners = ((x0, y0), (x1, y0), (x1, y1), (x0, y1))
+    return [v for i in range(4) for v in (corners[i], corners[(i + 1) % 4])]
+
+def _build_static(shader, x, y, size):
+    panel_y_min = y - 112
+    btn_r_y = y - 35
+    btn_e_y = y - 75
+    btn_g_y = y - 105
+    cx, cy = x + size/2, y + size/2
+    b_col = (0.32, 0.32, 0.32, 1.0)
+
+    def tris(verts):
+        return batch_for_shader(shader, 'TRIS', {"pos": verts})
+
+    def lines(verts):
+        return batch_for_shader(shader, 'LINES', {"pos": verts})
+
+    # Drawn below the mapping circles
+    _BATCH_CACHE["under"] = [
+        # Main Panel Background (Covers buttons below the joystick)
+        (tris(_quad(x-4, panel_y_min, x+size+4, y+size)), (0.18, 0.18, 0.18, 0.98)),
+        (lines(_outline(x-4, panel_y_min, x+size+4, y+size)), (0.3, 0.3, 0.3, 0.98)),
+        # Draggable Header Box
+        (tris(_quad(x-4, y+size, x+size+4, y+size+25)), (0.12, 0.12, 0.12, 0.98)),
+        # Joystick Grid Background (Sunken Area) and Outersquare Border
+        (tris(_quad(x, y, x+size, y+size)), (0.11, 0.11, 0.11, 1.0)),
+        (lines(_outline(x, y, x+size, y+size)), (0.05, 0.05, 0.05, 1.0)),
+    ]
+
+    # Drawn above the mapping circles. Buttons never overlap, so same-colored
+    # fills and all outlines share one batch each.
+    _BATCH_CACHE["over"] = [
+        (lines(((cx, y), (cx, y+size), (x, cy), (x+size, cy))), (0.2, 0.2, 0.2, 1.0)),
+        # Reset Button, Left and Right group boxes
+        (tris(_quad(x, btn_r_y, x+size, btn_r_y+30)
+              + _quad(x, btn_g_y, x+30, btn_g_y+25)
+              + _quad(x+size-30, btn_g_y, x+size, btn_g_y+25)), b_col),
+        # Edit Values Display
+        (tris(_quad(x, btn_e_y, x+size, btn_e_y+35)), (0.11, 0.11, 0.11, 1.0)),
+        # Group Name Box
+        (tris(_quad(x+35, btn_g_y, x+size-35, btn_g_y+25)), (0.22, 0.22, 0.22, 1.0)),
+        (lines(_outline(x, btn_r_y, x+size, btn_r_y+30)
+               + _outline(x, btn_e_y, x+size, btn_e_y+35)
+               + _outline(x, btn_g_y, x+30, btn_g_y+25)
+               + _outline(x+35, btn_g_y, x+size-35, btn_g_y+25)
+               + _outline(x+size-30, btn_g_y, x+size, btn_g_y+25)), (0.1, 0.1, 0.1, 1.0)),
+    ]
+
+    # Joystick dot around the origin, translated at draw time
+    _BATCH_CACHE["dot"] = tris(_quad(-8, -8, 8, 8))
+
+def _build_layout(shader, plan, limit, x, y, size):
+    half = size/2
+    px = (x + half) + (plan.target_x / limit) * half
+    py = (y + half) + (plan.target_y / limit) * half
+    pr = (plan.radius / limit) * half
+    _BATCH_CACHE["labels"] = _build_labels(px.tolist(), py.tolist(), plan.labels, x, y, size)
+
+    if not plan.count:
+        _BATCH_CACHE["circles"] = None
+        _BATCH_CACHE["points"] = None
+        return
+
+    # Every circle as LINES segments in one batch
+    ring_x = px[:, None] + pr[:, None] * _UNIT_COS[None, :]
+    ring_y = py[:, None] + pr[:, None] * _UNIT_SIN[None, :]
+    ring = np.stack((ring_x, ring_y), axis=-1)
+    segments = np.stack((ring[:, :-1], ring[:, 1:]), axis=2)
+    circle_verts = np.ascontiguousarray(segments.reshape(-1, 2), dtype=np.float32)
+    _BATCH_CACHE["circles"] = batch_for_shader(shader, 'LINES', {"pos": circle_verts})
+
+    centers = np.stack((px, py), axis=-1).astype(np.float32)
+    point_verts = np.ascontiguousarray((centers[:, None, :] + _POINT_QUAD[None, :, :]).reshape(-1, 2))
+    _BATCH_CACHE["points"] = batch_for_shader(shader, 'TRIS', {"pos": point_verts})
+
+def _build_pick_index(plan, limit, x, y, size):
+    half = size/2
+    pos_x = ((x + half) + (plan.target_x / limit) * half).tolist()
+    pos_y = ((y + half) + (plan.target_y / limit) * half).tolist()
+    cells = {}
+    for idx, (px, py) in enumerate(zip(pos_x, pos_y)):
+        cells.setdefault((int(px // PICK_RADIUS), int(py // PICK_RADIUS)), []).append(idx)
+    _PICK_INDEX["cells"] = cells
+    _PICK_INDEX["points"] = list(zip(pos_x, pos_y))
+
+def pick_target(group, limit, mx, my):
+    # Index of the target point nearest to (mx, my) within PICK_RADIUS, or -1.
+    # Cells are PICK_RADIUS wide, so only the 3x3 neighbourhood can hold a hit.
+    plan = get_plan(group)
+    x, y, size = HUD_STATE["x"], HUD_STATE["y"], HUD_STATE["size"]
+    key = (x, y, size, limit, plan.revision)
+    if _PICK_INDEX["plan"] is not plan or _PICK_INDEX["key"] != key:
+        _build_pick_index(plan, limit, x, y, size)
+        _PICK_INDEX["plan"] = plan
+        _PICK_INDEX["key"] = key
+
+    cells = _PICK_INDEX["cells"]
+    points = _PICK_INDEX["points"]
+    cx, cy = int(mx // PICK_RADIUS), int(my // PICK_RADIUS)
+    best = -1
+    best_dist = PICK_RADIUS
+    for i in (cx - 1, cx, cx + 1):
+        for j in (cy - 1, cy, cy + 1):
+            for idx in cells.get((i, j), ()):
+                px, py = points[idx]
+                dist = math.hypot(mx - px, my - py)
+                if dist < best_dist:
+                    best = idx
+                    best_dist = dist
+    return best
+
+def _text_size(text):
+    dims = _TEXT_SIZES.get(text)
+    if dims is None:
+        blf.size(0, LABEL_SIZE)
+        dims = _TEXT_SIZES[text] = blf.dimensions(0, text)
+    return dims
+
+def _build_labels(pos_x, pos_y, names, x, y, size):
+    # Places mapping labels once per layout change. Labels anchored outside the grid
+    # are culled, and a label that would overlap one already placed is folded into
+    # that label's "+N" count badge instead of being drawn on top of it.
+    cell = 16
+    buckets = {}
+    placed = []
+    hidden = []
+    for px, py, name in zip(pos_x, pos_y, names):
+        if not name:
+            continue
+        lx, ly = px + LABEL_OFFSET, py + LABEL_OFFSET
+        if not (x <= lx <= x + size and y <= ly <= y + size):
+            continue
+        w, h = _text_size(name)
+        rect = (lx, ly, lx + w, ly + h)
+        cells = [(cx, cy)
+                 for cx in range(int(rect[0] // cell), int(rect[2] // cell) + 1)
+                 for cy in range(int(rect[1] // cell), int(rect[3] // cell) + 1)]
+
+        blocker = -1
+        for key in cells:
+            for idx in buckets.get(key, ()):
+                other = placed[idx][3]
+                if rect[0] < other[2] and other[0] < rect[2] and rect[1] < other[3] and other[1] < rect[3]:
+                    blocker = idx
+                    break
+            if blocker >= 0:
+                break
+
+        if blocker >= 0:
+            hidden[blocker] += 1
+            continue
+        for key in cells:
+            buckets.setdefault(key, []).append(len(placed))
+        placed.append((lx, ly, name, rect))
+        hidden.append(0)
+
+    return [(lx, ly, f"{name} +{count}" if count else name)
+            for (lx, ly, name, _), count in zip(placed, hidden)]
+
 def draw_hud():
     if not HUD_STATE["running"]:
         return
@@ -31,154 +228,88 @@ def draw_hud():
     jx = group.joy_x if group else 0.0
     jy = group.joy_y if group else 0.0
     
-    # Main Panel Background (Covers buttons below the joystick)
-    panel_y_min = y - 112
-    p_verts = ((x-4, panel_y_min), (x+size+4, panel_y_min), (x+size+4, y+size), (x-4, y+size))
-    p_batch = batch_for_shader(shader, 'TRIS', {"pos": p_verts}, indices=((0, 1, 2), (2, 3, 0)))
-    shader.bind()
-    shader.uniform_float("color", (0.18, 0.18, 0.18, 0.98))
-    p_batch.draw(shader)
-    
-    # Draw Panel Outline
-    out_verts = ((x-4, panel_y_min), (x+size+4, panel_y_min), (x+size+4, y+size), (x-4, y+size))
-    out_batch = batch_for_shader(shader, 'LINE_LOOP', {"pos": out_verts})
-    shader.uniform_float("color", (0.3, 0.3, 0.3, 0.98))
-    out_batch.draw(shader)
+    static_key = (x, y, size)
+    if _BATCH_CACHE["static_key"] != static_key:
+        _build_static(shader, x, y, size)
+        _BATCH_CACHE["static_key"] = static_key
     
-    # Draggable Header Box
-    h_verts = ((x-4, y+size), (x+size+4, y+size), (x+size+4, y+size+25), (x-4, y+size+25))
-    h_batch = batch_for_shader(shader, 'TRIS', {"pos": h_verts}, indices=((0, 1, 2), (2, 3, 0)))
-    shader.uniform_float("color", (0.12, 0.12, 0.12, 0.98))
-    h_batch.draw(shader)
+    shader.bind()
+    for batch, color in _BATCH_CACHE["under"]:
+        shader.uniform_float("color", color)
+        batch.draw(shader)
     
     blf.position(0, x + 8, y + size + 7, 0)
     blf.size(0, 14)
     blf.color(0, 0.9, 0.9, 0.9, 1.0)
     blf.draw(0, "Bone Axis Control")
 
-    # Joystick Grid Background (Sunken Area)
-    bg_verts = ((x, y), (x+size, y), (x+size, y+size), (x, y+size))
-    bg_batch = batch_for_shader(shader, 'TRIS', {"pos": bg_verts}, indices=((0, 1, 2), (2, 3, 0)))
-    shader.uniform_float("color", (0.11, 0.11, 0.11, 1.0))
-    bg_batch.draw(shader)
-    
-    # Joystick Outersquare Border
-    bg_out_batch = batch_for_shader(shader, 'LINE_LOOP', {"pos": bg_verts})
-    shader.uniform_float("color", (0.05, 0.05, 0.05, 1.0))
-    bg_out_batch.draw(shader)
-
     cx, cy = x + size/2, y + size/2
     
     if group and hasattr(group, 'bone_xy_list'):
-        # Enable Scissor testing to crop drawings to the joystick bounds
-        try:
-            bgl_ok = True
-            import bgl
-        except ImportError:
-            bgl_ok = False
-            
-        if bgl_ok:
-            bgl.glEnable(bgl.GL_SCISSOR_TEST)
-            # Scissor parameters: x, y, width, height
-            # Note: bgl scissor uses screen coordinates, which match viewport directly here
-            bgl.glScissor(int(x), int(y), int(size), int(size))
-            
-        for item in group.bone_xy_list:
-            px = cx + (item.target_x / limit) * (size/2)
-            py = cy + (item.target_y / limit) * (size/2)
-            pr = (item.radius / limit) * (size/2)
+        plan = get_plan(group)
+        layout_key = (x, y, size, limit, plan.revision)
+        if _BATCH_CACHE["layout_plan"] is not plan or _BATCH_CACHE["layout_key"] != layout_key:
+            _build_layout(shader, plan, limit, x, y, size)
+            _BATCH_CACHE["layout_plan"] = plan
+            _BATCH_CACHE["layout_key"] = layout_key
+        
+        # Crop mapping circles and labels to the joystick bounds
+        prev_scissor = gpu.state.scissor_get()
+        gpu.state.scissor_test_set(True)
+        gpu.state.scissor_set(int(x), int(y), int(size), int(size))
             
-            circle_verts = [(px + math.cos(i/32 * 2*math.pi)*pr, py + math.sin(i/32 * 2*math.pi)*pr) for i in range(33)]
-            circle_batch = batch_for_shader(shader, 'LINE_STRIP', {"pos": circle_verts})
+        if _BATCH_CACHE["circles"]:
+            shader.bind()
             shader.uniform_float("color", (1.0, 0.2, 0.2, 0.6))
-            circle_batch.draw(shader)
-            
-            p_verts = ((px-3, py-3), (px+3, py-3), (px+3, py+3), (px-3, py+3))
-            p_batch = batch_for_shader(shader, 'TRIS', {"pos": p_verts}, indices=((0, 1, 2), (2, 3, 0)))
+            _BATCH_CACHE["circles"].draw(shader)
             shader.uniform_float("color", (0.8, 0.8, 0.8, 1.0))
-            p_batch.draw(shader)
+            _BATCH_CACHE["points"].draw(shader)
             
-            name_str = item.bone_name if item.target_type == 'BONE' else "Object"
-            if name_str:
-                blf.position(0, px + 5, py + 5, 0)
-                blf.size(0, 12)
-                blf.color(0, 1.0, 1.0, 1.0, 1.0)
-                blf.draw(0, name_str)
+            hover = HUD_STATE.get("dragging_target_idx", -1)
+            if hover < 0:
+                hover = HUD_STATE.get("hover_target_idx", -1)
+            if 0 <= hover < plan.count:
+                half = size/2
+                gpu.matrix.push()
+                gpu.matrix.translate((x + half + plan.target_x[hover] / limit * half,
+                                      y + half + plan.target_y[hover] / limit * half))
+                gpu.matrix.scale((0.6, 0.6))
+                shader.uniform_float("color", (1.0, 0.8, 0.2, 1.0))
+                _BATCH_CACHE["dot"].draw(shader)
+                gpu.matrix.pop()
+            
+        blf.size(0, LABEL_SIZE)
+        blf.color(0, 1.0, 1.0, 1.0, 1.0)
+        for lx, ly, text in _BATCH_CACHE["labels"]:
+            blf.position(0, lx, ly, 0)
+            blf.draw(0, text)
         
-        # Disable Scissor Testing
-        if bgl_ok:
-            bgl.glDisable(bgl.GL_SCISSOR_TEST)
-
-    line_verts = ((cx, y), (cx, y+size), (x, cy), (x+size, cy))
-    line_batch = batch_for_shader(shader, 'LINES', {"pos": line_verts})
-    shader.uniform_float("color", (0.2, 0.2, 0.2, 1.0))
-    line_batch.draw(shader)
+        gpu.state.scissor_set(*prev_scissor)
+        gpu.state.scissor_test_set(False)
+
+    shader.bind()
+    for batch, color in _BATCH_CACHE["over"]:
+        shader.uniform_float("color", color)
+        batch.draw(shader)
     
     if group:
-        dot_x = cx + (jx * size/2)
-        dot_y = cy + (jy * size/2)
-        dot_verts = ((dot_x-8, dot_y-8), (dot_x+8, dot_y-8), (dot_x+8, dot_y+8), (dot_x-8, dot_y+8))
-        dot_batch = batch_for_shader(shader, 'TRIS', {"pos": dot_verts}, indices=((0, 1, 2), (2, 3, 0)))
+        gpu.matrix.push()
+        gpu.matrix.translate((cx + (jx * size/2), cy + (jy * size/2)))
         shader.uniform_float("color", (0.3, 0.6, 1.0, 1.0))
-        dot_batch.draw(shader)
+        _BATCH_CACHE["dot"].draw(shader)
+        gpu.matrix.pop()
     
     # Standard Blender UI Colors for Buttons
-    b_col = (0.32, 0.32, 0.32, 1.0)
     t_col = (0.85, 0.85, 0.85, 1.0)
     
-    # Reset Button
     btn_r_y = y - 35
-    r_verts = ((x, btn_r_y), (x+size, btn_r_y), (x+size, btn_r_y+30), (x, btn_r_y+30))
-    r_batch = batch_for_shader(shader, 'TRIS', {"pos": r_verts}, indices=((0, 1, 2), (2, 3, 0)))
-    shader.uniform_float("color", b_col)
-    r_batch.draw(shader)
-    r_out = batch_for_shader(shader, 'LINE_LOOP', {"pos": r_verts})
-    shader.uniform_float("color", (0.1, 0.1, 0.1, 1.0))
-    r_out.draw(shader)
-    
-    # Edit Values Display
     btn_e_y = y - 75
-    e_verts = ((x, btn_e_y), (x+size, btn_e_y), (x+size, btn_e_y+35), (x, btn_e_y+35))
-    e_batch = batch_for_shader(shader, 'TRIS', {"pos": e_verts}, indices=((0, 1, 2), (2, 3, 0)))
-    shader.uniform_float("color", (0.11, 0.11, 0.11, 1.0))
-    e_batch.draw(shader)
-    e_out = batch_for_shader(shader, 'LINE_LOOP', {"pos": e_verts})
-    shader.uniform_float("color", (0.1, 0.1, 0.1, 1.0))
-    e_out.draw(shader)
 
     val_x = jx * limit
     val_y = jy * limit
 
-    # Separate Group Selection Boxes [ < ] [ Group Name ] [ > ]
     btn_g_y = y - 105
 
-    # Left Box
-    gL_verts = ((x, btn_g_y), (x+30, btn_g_y), (x+30, btn_g_y+25), (x, btn_g_y+25))
-    gL_batch = batch_for_shader(shader, 'TRIS', {"pos": gL_verts}, indices=((0, 1, 2), (2, 3, 0)))
-    shader.uniform_float("color", b_col)
-    gL_batch.draw(shader)
-    gL_out = batch_for_shader(shader, 'LINE_LOOP', {"pos": gL_verts})
-    shader.uniform_float("color", (0.1, 0.1, 0.1, 1.0))
-    gL_out.draw(shader)
-
-    # Middle Box
-    gM_verts = ((x+35, btn_g_y), (x+size-35, btn_g_y), (x+size-35, btn_g_y+25), (x+35, btn_g_y+25))
-    gM_batch = batch_for_shader(shader, 'TRIS', {"pos": gM_verts}, indices=((0, 1, 2), (2, 3, 0)))
-    shader.uniform_float("color", (0.22, 0.22, 0.22, 1.0))
-    gM_batch.draw(shader)
-    gM_out = batch_for_shader(shader, 'LINE_LOOP', {"pos": gM_verts})
-    shader.uniform_float("color", (0.1, 0.1, 0.1, 1.0))
-    gM_out.draw(shader)
-
-    # Right Box
-    gR_verts = ((x+size-30, btn_g_y), (x+size, btn_g_y), (x+size, btn_g_y+25), (x+size-30, btn_g_y+25))
-    gR_batch = batch_for_shader(shader, 'TRIS', {"pos": gR_verts}, indices=((0, 1, 2), (2, 3, 0)))
-    shader.uniform_float("color", b_col)
-    gR_batch.draw(shader)
-    gR_out = batch_for_shader(shader, 'LINE_LOOP', {"pos": gR_verts})
-    shader.uniform_float("color", (0.1, 0.1, 0.1, 1.0))
-    gR_out.draw(shader)
-
     blf.position(0, x + 50, btn_r_y + 8, 0)
     blf.size(0, 14)
     blf.color(0, t_col[0], t_col[1], t_col[2], 1.0)
@@ -1,7 +1,10 @@
 import bpy
 from ..core.state import HUD_STATE
-from ..core.main import get_active_group
-from ..interface.tracker import is_tracker_running
+from ..core import registry
+from ..core.main import get_active_group, invalidate_plans, invalidate_caches, limit_insert, limit_remove
+from ..interface.tracker import is_tracker_running, tracker_latency, is_recording, REPLAY_STATE
+from ..interface import stats
+from ..interface.take import TAKE_STATE
 
 class bone_xy_UL_group_list(bpy.types.UIList):
     def draw_item(self, context, layout, data, item, icon, active_data, active_propname, index):
@@ -28,6 +31,9 @@ class bone_xy_OT_add_group(bpy.types.Operator):
         new_group = obj.bone_xy_groups.add()
         new_group.name = f"Group {len(obj.bone_xy_groups)}"
         obj.bone_xy_group_index = len(obj.bone_xy_groups) - 1
+        # Growing the collection can relocate every group, so caches keyed by pointer go stale
+        invalidate_caches()
+        registry.refresh(obj)
         return {'FINISHED'}
 
 class bone_xy_OT_remove_group(bpy.types.Operator):
@@ -40,6 +46,8 @@ class bone_xy_OT_remove_group(bpy.types.Operator):
         if obj.bone_xy_groups:
             obj.bone_xy_groups.remove(obj.bone_xy_group_index)
             obj.bone_xy_group_index = min(max(0, obj.bone_xy_group_index - 1), len(obj.bone_xy_groups) - 1)
+            invalidate_caches()
+            registry.refresh(obj)
         return {'FINISHED'}
 
 class bone_xy_OT_add(bpy.types.Operator):
@@ -51,8 +59,10 @@ class bone_xy_OT_add(bpy.types.Operator):
         obj = context.active_object
         group = get_active_group(obj)
         if group:
-            group.bone_xy_list.add()
+            item = group.bone_xy_list.add()
             group.bone_xy_index = len(group.bone_xy_list) - 1
+            invalidate_plans(group)
+            limit_insert(group, group.bone_xy_index, item.target_x, item.target_y)
         return {'FINISHED'}
 
 class bone_xy_OT_remove(bpy.types.Operator):
@@ -64,8 +74,11 @@ class bone_xy_OT_remove(bpy.types.Operator):
         obj = context.active_object
         group = get_active_group(obj)
         if group and group.bone_xy_list:
-            group.bone_xy_list.remove(group.bone_xy_index)
-            group.bone_xy_index = min(max(0, group.bone_xy_index - 1), len(group.bone_xy_list) - 1)
+            idx = group.bone_xy_index
+            group.bone_xy_list.remove(idx)
+            group.bone_xy_index = min(max(0, idx - 1), len(group.bone_xy_list) - 1)
+            invalidate_plans(group)
+            limit_remove(group, idx)
         return {'FINISHED'}
 
 class bone_xy_PT_panel(bpy.types.Panel):
@@ -97,6 +110,12 @@ class bone_xy_PT_panel(bpy.types.Panel):
             layout.separator()
             if hasattr(context.scene, "bone_xy_allow_drag"):
                 layout.prop(context.scene, "bone_xy_allow_drag")
+            if hasattr(context.scene, "bone_xy_record_buffered"):
+                row_rec = layout.row(align=True)
+                row_rec.prop(context.scene, "bone_xy_record_buffered")
+                sub = row_rec.row(align=True)
+                sub.active = context.scene.bone_xy_record_buffered
+                sub.prop(context.scene, "bone_xy_record_playback", text="", icon='PLAY')
             layout.separator()
             
             layout.label(text="Groups:")
@@ -203,12 +222,77 @@ class bone_xy_PT_panel(bpy.types.Panel):
             layout.separator()
             layout.label(text="Tracker Interface:", icon='CAMERA_DATA')
             box_trk = layout.box()
-            if hasattr(context.scene, "bone_xy_tracker_port"):
+            use_ring = getattr(context.scene, "bone_xy_tracker_transport", 'UDP') == 'RING'
+            if hasattr(context.scene, "bone_xy_tracker_transport"):
+                row_tr = box_trk.row()
+                row_tr.enabled = not is_tracker_running()
+                row_tr.prop(context.scene, "bone_xy_tracker_transport", expand=True)
+                if use_ring:
+                    box_trk.prop(context.scene, "bone_xy_tracker_ring_path", text="")
+            if hasattr(context.scene, "bone_xy_tracker_port") and not use_ring:
                 box_trk.prop(context.scene, "bone_xy_tracker_port")
+                col_src = box_trk.column(align=True)
+                col_src.enabled = not is_tracker_running()
+                for i, source in enumerate(context.scene.bone_xy_tracker_sources):
+                    row_src = col_src.row(align=True)
+                    row_src.prop(source, "kind", text="")
+                    if source.kind == 'UNIX':
+                        row_src.prop(source, "path", text="")
+                    else:
+                        row_src.prop(source, "port", text="")
+                    row_src.prop(source, "target", text="")
+                    row_src.operator("bone_xy.tracker_source_remove", text="", icon='X').index = i
+                col_src.operator("bone_xy.tracker_source_add", text="Add Source", icon='ADD')
+            if hasattr(context.scene, "bone_xy_tracker_rate"):
+                row_rate = box_trk.row(align=True)
+                row_rate.prop(context.scene, "bone_xy_tracker_rate")
+                row_rate.prop(context.scene, "bone_xy_tracker_adaptive", text="", icon='AUTO')
+            if hasattr(context.scene, "bone_xy_tracker_smoothing"):
+                row_smooth = box_trk.row(align=True)
+                row_smooth.prop(context.scene, "bone_xy_tracker_smoothing")
+                sub = row_smooth.row(align=True)
+                sub.active = context.scene.bone_xy_tracker_smoothing
+                sub.prop(context.scene, "bone_xy_tracker_latency", text="ms")
             if is_tracker_running():
-                box_trk.operator("bone_xy.tracker_stop", text="Stop UDP Server", icon='CANCEL')
+                box_trk.label(text=f"Latency: {tracker_latency() * 1000.0:.1f} ms", icon='TIME')
+                snap = stats.snapshot()
+                col_stats = box_trk.column(align=True)
+                col_stats.scale_y = 0.8
+                col_stats.label(text=f"{snap['packets_per_second']} packets/s, {snap['parse_errors']} malformed")
+                col_stats.label(text=f"p50 {snap['latency_p50'] * 1000.0:.1f} / p95 {snap['latency_p95'] * 1000.0:.1f}"
+                                     f" / max {snap['latency_max'] * 1000.0:.1f} ms")
+                col_stats.label(text=f"Queue {snap['queue_depth']}, coalesced {snap['coalesced']},"
+                                     f" dropped {snap['dropped']}, unrouted {snap['unrouted']}")
+                if snap["last_error"]:
+                    col_stats.label(text=snap["last_error"], icon='ERROR')
+                box_trk.operator("bone_xy.tracker_stop", text="Stop Ring Reader" if use_ring else "Stop UDP Server", icon='CANCEL')
             else:
-                box_trk.operator("bone_xy.tracker_start", text="Start UDP Server", icon='PLAY')
+                box_trk.operator("bone_xy.tracker_start", text="Start Ring Reader" if use_ring else "Start UDP Server", icon='PLAY')
+            if TAKE_STATE["active"]:
+                box_trk.operator("bone_xy.tracker_take", text="Stop Take", icon='SNAP_FACE')
+            else:
+                box_trk.operator("bone_xy.tracker_take", text="Record Take", icon='REC')
+                if TAKE_STATE["result"] is not None:
+                    groups, keys = TAKE_STATE["result"]
+                    box_trk.label(text=f"Take committed: {keys} keys on {groups} groups")
+            if hasattr(context.scene, "bone_xy_tracker_log_path"):
+                box_trk.prop(context.scene, "bone_xy_tracker_log_path", text="")
+                row_log = box_trk.row(align=True)
+                if is_recording():
+                    row_log.operator("bone_xy.tracker_record", text="Stop Recording", icon='SNAP_FACE')
+                else:
+                    row_log.operator("bone_xy.tracker_record", text="Record", icon='REC')
+                if REPLAY_STATE["running"]:
+                    row_log.operator("bone_xy.tracker_replay", text="Stop Replay", icon='PAUSE')
+                else:
+                    row_log.operator("bone_xy.tracker_replay", text="Replay", icon='PLAY')
+                row_log.prop(context.scene, "bone_xy_tracker_replay_speed", text="")
+                if REPLAY_STATE["error"]:
+                    box_trk.label(text=REPLAY_STATE["error"], icon='ERROR')
+                elif REPLAY_STATE["messages"]:
+                    elapsed = REPLAY_STATE["elapsed"]
+                    rate = f", {REPLAY_STATE['messages'] / elapsed:.0f}/s" if elapsed > 0.0 else ""
+                    box_trk.label(text=f"Replayed {REPLAY_STATE['messages']} messages{rate}")
         except Exception as e:
             box = layout.box()
             box.alert = True
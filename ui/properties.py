@@ -1,8 +1,12 @@
 import bpy
-from ..core.main import get_active_group, get_limit, update_transforms
+from ..core.main import get_active_group, get_limit, update_transforms, locate_item, invalidate_plans, invalidate_caches, limit_set_target, patch_plan_target
 from ..core.state import HUD_STATE
+from ..core import registry
 
 def on_property_update(self, context):
+    if HUD_STATE["suspend_updates"]:
+        # The caller batches its assignments and evaluates once itself
+        return
     if HUD_STATE["running"]:
         obj = context.active_object
         if obj:
@@ -15,31 +19,48 @@ def on_property_update(self, context):
             if area.type == 'VIEW_3D':
                 area.tag_redraw()
 
+def on_mapping_update(self, context):
+    group, _ = locate_item(self)
+    if group:
+        invalidate_plans(group)
+    else:
+        invalidate_plans()
+    on_property_update(self, context)
+
+def on_target_update(self, context):
+    group, index = locate_item(self)
+    if group:
+        limit_set_target(group, index, self.target_x, self.target_y)
+        patch_plan_target(group, index, self.target_x, self.target_y, self.blend_mode)
+    else:
+        invalidate_caches()
+    on_property_update(self, context)
+
 class bone_xy_PG_item(bpy.types.PropertyGroup):
     target_type: bpy.props.EnumProperty(
         name="Type",
         items=[('BONE', "Bone Pose", ""), ('OBJECT', "Object Transform", "")],
         default='BONE',
-        update=on_property_update
+        update=on_mapping_update
     )
-    bone_name: bpy.props.StringProperty(update=on_property_update)
+    bone_name: bpy.props.StringProperty(update=on_mapping_update)
     prop_type: bpy.props.EnumProperty(
         name="Property",
         items=[('LOCATION', "Location", ""), ('ROTATION', "Rotation (Euler)", ""), ('SCALE', "Scale", "")],
         default='LOCATION',
-        update=on_property_update
+        update=on_mapping_update
     )
     axis_index: bpy.props.EnumProperty(
         name="Axis",
         items=[('0', "X", ""), ('1', "Y", ""), ('2', "Z", "")],
         default='0',
-        update=on_property_update
+        update=on_mapping_update
     )
-    max_value: bpy.props.FloatProperty(name="Max Add Value", default=1.0, update=on_property_update)
+    max_value: bpy.props.FloatProperty(name="Max Add Value", default=1.0, update=on_mapping_update)
     
-    target_x: bpy.props.FloatProperty(default=1.0, update=on_property_update)
-    target_y: bpy.props.FloatProperty(default=0.0, update=on_property_update)
-    radius: bpy.props.FloatProperty(default=1.0, min=0.001, update=on_property_update)
+    target_x: bpy.props.FloatProperty(default=1.0, update=on_target_update)
+    target_y: bpy.props.FloatProperty(default=0.0, update=on_target_update)
+    radius: bpy.props.FloatProperty(default=1.0, min=0.001, update=on_mapping_update)
     blend_mode: bpy.props.EnumProperty(
         name="Blend Mode",
         items=[
@@ -50,7 +71,7 @@ class bone_xy_PG_item(bpy.types.PropertyGroup):
             ('AXIS_Y', "Y-Axis", "")
         ],
         default='AUTO',
-        update=on_property_update
+        update=on_mapping_update
     )
 
 class bone_xy_PG_preset_state(bpy.types.PropertyGroup):
@@ -66,8 +87,11 @@ class bone_xy_PG_preset(bpy.types.PropertyGroup):
 def on_preset_change(self, context):
     pass
 
+def on_group_rename(self, context):
+    registry.refresh(self.id_data)
+
 class bone_xy_PG_group(bpy.types.PropertyGroup):
-    name: bpy.props.StringProperty(default="New Group")
+    name: bpy.props.StringProperty(default="New Group", update=on_group_rename)
     joy_x: bpy.props.FloatProperty(default=0.0, update=on_property_update)
     joy_y: bpy.props.FloatProperty(default=0.0, update=on_property_update)
     bone_xy_list: bpy.props.CollectionProperty(type=bone_xy_PG_item)